@@ -25,6 +25,7 @@ class DocumentBlock(StructBlock):
         label = _("Link Icon F.A. Code"),
         default = "far fa-file",
         required = False,
+        search_index = False,
     )
     appearance = ButtonChoiceBlock(
         max_length=15,
@@ -77,6 +78,7 @@ class DocumentListBlock(StructBlock):
         label = _("Tag List"),
         help_text = _("Comma seperated list of tags to filter by. Leave blank to list all documents."),
         required = False,
+        search_index = False,
     )
     text_size = TextSizeChoiceBlock(
         label = _("Text Size"),
@@ -86,6 +88,7 @@ class DocumentListBlock(StructBlock):
         label = _("Link Icon"),
         help_text = _("Optional FontAwesome icon to appear left of the link (eg fas fa-file)"),
         required = False,
+        search_index = False,
     )
     appearance = ButtonChoiceBlock(
         max_length=15,
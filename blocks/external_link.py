@@ -21,6 +21,7 @@ class ExternalLinkEmbedBlock(StructBlock):
         max_length=200, 
         null=True, 
         blank=True,
+        search_index=False,
     )
     description = RichTextBlock(
         null=True, 
@@ -20,6 +20,7 @@ class HeadingBlock(StructBlock):
     bookmark = CharBlock(
         required=False,
         label=_("Optional Anchor ID"),
+        search_index=False,
     )
     
     class Meta:
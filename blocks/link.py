@@ -46,7 +46,8 @@ class Link(StructBlock):
             )),
             ("url_link", CharBlock(
                 label=_("Link to external site or internal URL"),
-                required=False
+                required=False,
+                search_index=False
             )),
             ("button_text", CharBlock(
                 label=_("Button Text"),
@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from blocks.templatetags.csv_table_block_tags import (render_html_table,
+                                                      render_html_table_pandas,
+                                                      stream_html_table)
+
+
+def sample_csv(rows, seed=0):
+    rng = random.Random(seed)
+    lines = ["Region,Code,Population,Share,Growth,Active,Notes"]
+    for row in range(rows):
+        lines.append(",".join([
+            f"Region {row}",
+            f"R{row:05d}",
+            str(rng.randint(1000, 5000000)),
+            f"{rng.random() * 100:.4f}",
+            "" if row % 7 == 0 else f"{rng.uniform(-5, 5):.3f}",
+            rng.choice(["True", "False"]),
+            rng.choice(["", "estimate", "provisional", "revised 2023"]),
+        ]))
+    return "\n".join(lines)
+
+
+class Command(BaseCommand):
+    help = "Time CSVTableBlock rendering: pandas Styler, csv streaming renderer and cached"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[20, 5000], help="Row counts to time")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per renderer")
+
+    def time_call(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        for rows in options["sizes"]:
+            table_block = {
+                "data": sample_csv(rows),
+                "precision": 2,
+                "column_headers": True,
+                "row_headers": True,
+                "compact": False,
+            }
+            try:
+                pandas_ms = f"{self.time_call(lambda: render_html_table_pandas(table_block), repeat):8.1f}ms"
+            except ImportError as e:
+                pandas_ms = f"n/a ({e})"
+            stream_ms = self.time_call(
+                lambda: "".join(stream_html_table(table_block, table_id="T_benchmark")), repeat
+            )
+            render_html_table(table_block)  # prime the cache
+            cached_ms = self.time_call(lambda: render_html_table(table_block), repeat)
+            self.stdout.write(
+                f"{rows:>6} rows | pandas {pandas_ms} | stream {stream_ms:8.1f}ms | cached {cached_ms:6.2f}ms"
+            )
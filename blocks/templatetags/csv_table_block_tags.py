@@ -1,12 +1,189 @@
-import pandas as pd
+import csv
+import hashlib
+import json
+import logging
+from html import escape
+from io import StringIO
+
 from django import template
+from django.core.cache import caches
 from django.utils.safestring import mark_safe
-from io import StringIO
 
 register = template.Library()
+logger = logging.getLogger(__name__)
+
+TABLE_CACHE_KEY = "csv-table:{}"
+TABLE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+# bump to invalidate cached tables when the rendered markup changes
+RENDERER_VERSION = 2
+
+# pandas read_csv default na_values
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+TRUE_VALUES = {"True", "TRUE", "true"}
+FALSE_VALUES = {"False", "FALSE", "false"}
+
+NUMERIC_STYLE = "text-align: right; padding-right: 0.7rem;"
+ROW_HEADER_STYLE = (
+    "font-weight: bold; border-right-width: 0.1rem; border-right-color: var(--bs-dark);"
+)
+
 
 @register.filter()
 def render_html_table(table_block):
+    """
+    Render the CSV data of a CSVTableBlock as a bootstrap table.
+    Output is cached against a hash of the data and formatting options. Tables are
+    rendered with the csv module; pandas is only imported if that fails.
+    """
+    options = [
+        table_block["data"],
+        table_block["precision"],
+        bool(table_block["column_headers"]),
+        bool(table_block["row_headers"]),
+        bool(table_block["compact"]),
+        RENDERER_VERSION,
+    ]
+    digest = hashlib.sha1(json.dumps(options).encode("utf-8")).hexdigest()
+    cache_key = TABLE_CACHE_KEY.format(digest)
+    html = caches["default"].get(cache_key)
+    if html is None:
+        try:
+            html = "".join(stream_html_table(table_block, table_id=f"T_{digest[:10]}"))
+        except Exception as e:
+            logger.warning(f"CSV table rendering failed, falling back to pandas: {e}")
+            html = render_html_table_pandas(table_block)
+        caches["default"].set(cache_key, html, TABLE_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+# int() and float() accept digit group underscores ("1_000"), read_csv does not
+def _parse_int(value):
+    if "_" in value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _parse_float(value):
+    if "_" in value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def infer_column_type(values):
+    """
+    Return 'boolean', 'integer', 'float' or 'string' for a column of non-missing
+    values, matching pandas read_csv followed by convert_dtypes() - floats that are
+    all whole numbers become integers, an empty column is numeric.
+    """
+    if values and all(v in TRUE_VALUES or v in FALSE_VALUES for v in values):
+        return "boolean"
+    if all(_parse_int(v) is not None for v in values):
+        return "integer"
+    floats = [_parse_float(v) for v in values]
+    if all(f is not None for f in floats):
+        if all(f.is_integer() for f in floats):
+            return "integer"
+        return "float"
+    return "string"
+
+
+def _header_names(row, width):
+    # pandas names blank headers 'Unnamed: n' and suffixes duplicates with .1, .2 ...
+    names, seen = [], {}
+    for i in range(width):
+        name = row[i] if i < len(row) and row[i] != "" else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _format_integer(value):
+    # only whole-number floats go through float, it would round integers above 2**53
+    number = _parse_int(value)
+    if number is None:
+        number = int(float(value))
+    return str(number)
+
+
+def _cell_formatter(column_type, precision):
+    if column_type == "boolean":
+        return lambda value: "True" if value in TRUE_VALUES else "False"
+    if column_type == "integer":
+        return _format_integer
+    if column_type == "float":
+        return lambda value: f"{float(value):.{precision}f}"
+    return escape
+
+
+def stream_html_table(table_block, table_id):
+    """
+    Yield the html for a CSV table without pandas.
+    The data is read once with the csv module, column types are inferred from the
+    parsed values and rows are emitted as they are formatted.
+    """
+    rows = list(csv.reader(StringIO(table_block["data"])))
+    header = rows.pop(0) if (table_block["column_headers"] and rows) else None
+    width = max([len(header or [])] + [len(row) for row in rows])
+    if header is not None and any(len(row) > len(header) for row in rows):
+        raise ValueError("CSV data has more fields than column headers")
+
+    # strip and null missing values as read_csv would
+    cells = [
+        [
+            None if i >= len(row) or row[i].strip() in NA_VALUES else row[i].strip()
+            for i in range(width)
+        ]
+        for row in rows
+    ]
+    types = [
+        infer_column_type([row[i] for row in cells if row[i] is not None])
+        for i in range(width)
+    ]
+    numeric = [i for i, column_type in enumerate(types) if column_type != "string"]
+    formatters = [_cell_formatter(column_type, table_block["precision"]) for column_type in types]
+
+    styles = [f"#{table_id} td.col{i}, #{table_id} th.col{i} {{ {NUMERIC_STYLE} }}" for i in numeric]
+    if table_block["row_headers"] and width:
+        styles.append(f"#{table_id} td.col0 {{ {ROW_HEADER_STYLE} }}")
+    if styles:
+        yield '<style type="text/css">\n' + "\n".join(styles) + "\n</style>\n"
+
+    classes = "table table-striped table-hover mb-0"
+    if table_block["compact"]:
+        classes += " table-sm"
+    yield f'<table id="{table_id}" class="{classes}">\n'
+
+    if header is not None:
+        yield "  <thead>\n    <tr>\n"
+        for i, name in enumerate(_header_names(header, width)):
+            yield f'      <th class="col_heading level0 col{i}">{escape(name)}</th>\n'
+        yield "    </tr>\n  </thead>\n"
+
+    yield "  <tbody>\n"
+    for r, row in enumerate(cells):
+        yield "    <tr>\n" + "".join(
+            f'      <td class="data row{r} col{i}">{"" if value is None else formatters[i](value)}</td>\n'
+            for i, value in enumerate(row)
+        ) + "    </tr>\n"
+    yield "  </tbody>\n</table>\n"
+
+
+def render_html_table_pandas(table_block):
+    import pandas as pd
+
     df = pd.read_csv(
         StringIO(table_block["data"]),
         header=("infer" if table_block["column_headers"] else None),
@@ -64,4 +241,4 @@ def render_html_table(table_block):
         {" table-sm" if table_block["compact"] else ""}"'
     dfs = dfs.set_table_attributes(classes)
 
-    return mark_safe(dfs.to_html())
+    return dfs.to_html()
@@ -1,5 +1,6 @@
 from django import template
 from blog.models import BlogDetailPage
+from core.renditions import BLOG_CARD_SPECS, prefetch_renditions
 from wagtail.models import Locale
 
 register = template.Library()
@@ -15,3 +16,12 @@ def get_latest_posts(post_count):
         .order_by("-first_published_at")[:post_count]
     )
     return posts
+
+
+@register.simple_tag()
+def prefetch_card_images(posts):
+    """
+    posts as a list with their card images and renditions loaded in a constant number
+    of queries - use inside any {% cache %} fragment rendering the cards.
+    """
+    return prefetch_renditions(posts, BLOG_CARD_SPECS)
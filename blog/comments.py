@@ -10,6 +10,8 @@ from django_comments_xtd.utils import send_mail
 from modelcluster.models import ParentalKey
 from userauth.models import CustomUser
 
+from core.page_cache import purge_page_responses
+
 from .detail_page import BlogDetailPage
         
 class BlogAuthorCommentNotified(models.Model):
@@ -32,6 +34,7 @@ class CustomComment(XtdComment):
         self.page = BlogDetailPage.objects.get(pk=self.object_pk)
         self.notify_author()
         super().save(*args, **kwargs)
+        purge_page_responses(self.page.pk)
 
     def notify_author(self):
         try:
@@ -0,0 +1,98 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils.translation import gettext_lazy as _
+from wagtail.models import Locale
+
+BLOG_FACETS_KEY = "blog-facets:{}:{}"
+
+
+class BlogFacetCount(models.Model):
+    """
+    Number of live, public posts for each tag and category of a blog listing, per
+    locale. Maintained from the publish, unpublish and delete hooks (see
+    update_blog_facets) so the listing sidebar doesn't aggregate on every request.
+    Counts are over the default locale posts (the posts every locale lists) - rows
+    for other locales carry the translated category name and slug.
+    """
+    TAG = 'tag'
+    CATEGORY = 'category'
+
+    listing = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    locale = models.ForeignKey('wagtailcore.Locale', on_delete=models.CASCADE, related_name='+')
+    facet_type = models.CharField(max_length=10, choices=[(TAG, _("Tag")), (CATEGORY, _("Category"))])
+    slug = models.CharField(max_length=100)
+    name = models.CharField(max_length=100)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = _("Blog Facet Count")
+        indexes = [models.Index(fields=['listing', 'locale', 'facet_type', 'name'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.count})"
+
+
+def _live_posts(page_model):
+    return page_model.objects.filter(locale=Locale.get_default()).live().public()
+
+
+def update_blog_facets(page_model):
+    """
+    Recount the tag and category facets of one blog detail page type from the live
+    posts and replace its rows for every locale. Cached facets are dropped.
+    """
+    posts = _live_posts(page_model).values('pk')
+    tag_counts = page_model.tags.through.objects.filter(content_object__in=posts).values(
+        'tag__slug', 'tag__name'
+    ).annotate(count=Count('content_object', distinct=True))
+    category_counts = dict(
+        page_model.objects.filter(pk__in=posts, categories__isnull=False)
+        .order_by()  # page ordering (path) would split the groups
+        .values_list('categories__translation_key')
+        .annotate(count=Count('pk', distinct=True))
+    )
+    category_model = page_model._meta.get_field('categories').related_model
+    categories = category_model.objects.filter(translation_key__in=category_counts)
+
+    listing = ContentType.objects.get_for_model(page_model)
+    locale_ids = list(Locale.objects.values_list('pk', flat=True))
+    facets = [
+        BlogFacetCount(
+            listing=listing, locale_id=locale_id, facet_type=BlogFacetCount.TAG,
+            slug=tag['tag__slug'], name=tag['tag__name'], count=tag['count'],
+        )
+        for tag in tag_counts
+        for locale_id in locale_ids
+    ] + [
+        BlogFacetCount(
+            listing=listing, locale_id=category.locale_id, facet_type=BlogFacetCount.CATEGORY,
+            slug=category.slug, name=category.name, count=category_counts[category.translation_key],
+        )
+        for category in categories
+    ]
+    with transaction.atomic():
+        BlogFacetCount.objects.filter(listing=listing).delete()
+        BlogFacetCount.objects.bulk_create(facets)
+    caches["default"].delete_many(
+        [BLOG_FACETS_KEY.format(page_model._meta.label_lower, locale_id) for locale_id in locale_ids]
+    )
+
+
+def get_blog_facets(page_model, locale):
+    """
+    Return {'category': [...], 'tag': [...]} for a blog detail page type in locale,
+    each a name ordered list of {'slug', 'name', 'count'} for facets with live posts.
+    """
+    cache = caches["default"]
+    cache_key = BLOG_FACETS_KEY.format(page_model._meta.label_lower, locale.pk)
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = {BlogFacetCount.CATEGORY: [], BlogFacetCount.TAG: []}
+        for facet in BlogFacetCount.objects.filter(
+            listing=ContentType.objects.get_for_model(page_model), locale=locale
+        ).order_by('facet_type', 'name').values('facet_type', 'slug', 'name', 'count'):
+            facets[facet.pop('facet_type')].append(facet)
+        cache.set(cache_key, facets, None)
+    return facets
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.facets import update_blog_facets
+from blog.models import PersonalBlogDetailPage, TechBlogDetailPage
+
+
+class Command(BaseCommand):
+    help = "Recount the tag and category facets shown on the blog listing pages"
+
+    def handle(self, *args, **options):
+        for page_model in (TechBlogDetailPage, PersonalBlogDetailPage):
+            update_blog_facets(page_model)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt facets for {page_model._meta.verbose_name}"))
@@ -1,20 +1,23 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.db import models
 from django.forms.widgets import CheckboxSelectMultiple
 from django.utils.translation import gettext_lazy as _
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.fields import ParentalManyToManyField
-from taggit.models import Tag
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Locale
 
 from blocks.streamblocks.simple import SimpleStreamBlock
 from core.models import SEOPage
+from core.pagination import get_paginator
+from core.renditions import (BLOG_CARD_SPECS, POST_BANNER_SPECS,
+                             prefetch_renditions)
 from core.utils import paginator_range
 
 from .categories import PersonalBlogCategory, TechBlogCategory
 from .detail_page import BlogDetailPage
+from .facets import BlogFacetCount, get_blog_facets
 from .panels import LocalizedSelectPanel
 from .tags import PersonalBlogPageTag, TechBlogPageTag
 
@@ -22,6 +25,7 @@ from .tags import PersonalBlogPageTag, TechBlogPageTag
 class TechBlogDetailPage(BlogDetailPage):
     template = 'blog/blog_page.html'
     parent_page_types = ['blog.TechBlogListingPage']
+    cache_response = True
 
     categories = ParentalManyToManyField(
         'blog.TechBlogCategory',
@@ -73,6 +77,8 @@ class PersonalBlogDetailPage(BlogDetailPage):
 
 class BlogListingPage(SEOPage):
     parent_page_types = ['home.HomePage']
+    # the banner is also rendered on each post (blog/detail/banner.html)
+    extra_rendition_specs = {'banner_image': POST_BANNER_SPECS}
 
     banner_image = models.ForeignKey(
         'wagtailimages.Image',
@@ -130,13 +136,13 @@ class BlogListingPage(SEOPage):
         default_lang = Locale.get_default()
         
         if type(self).__name__ == 'TechBlogListingPage':
-            all_posts = TechBlogDetailPage.objects.filter(locale_id=default_lang.id).live().defer_streamfields().public()
-            categories = TechBlogCategory.objects.filter(locale_id=active_lang.id)
-            tags = Tag.objects.annotate(ntag=models.Count('blog_techblogpagetag_items')).filter(ntag__gt=0).order_by('name')
+            post_model, category_model = TechBlogDetailPage, TechBlogCategory
         else:
-            all_posts = PersonalBlogDetailPage.objects.filter(locale_id=default_lang.id).live().defer_streamfields().public()
-            categories = PersonalBlogCategory.objects.filter(locale_id=active_lang.id)
-            tags = Tag.objects.annotate(ntag=models.Count('blog_personalblogpagetag_items')).filter(ntag__gt=0).order_by('name')
+            post_model, category_model = PersonalBlogDetailPage, PersonalBlogCategory
+        all_posts = post_model.objects.filter(locale_id=default_lang.id).live().defer_streamfields().public()
+        facets = get_blog_facets(post_model, active_lang)
+        categories = facets[BlogFacetCount.CATEGORY]
+        tags = facets[BlogFacetCount.TAG]
 
         category_filter = request.GET.get('category', None)
         tag_filter = request.GET.get('tag', None)
@@ -144,7 +150,7 @@ class BlogListingPage(SEOPage):
         filter = {'type': '', 'name': '', 'qstring': '', 'verbose': ''}
 
         if category_filter:
-            category_object = categories.filter(slug=category_filter)
+            category_object = category_model.objects.filter(locale_id=active_lang.id, slug=category_filter)
             if category_object:
                 if active_lang == default_lang:
                     all_posts = all_posts.filter(categories__slug__exact=category_filter)
@@ -163,16 +169,13 @@ class BlogListingPage(SEOPage):
             filter['type'] = 'tag'
             filter['name'] = tag_filter
             filter['qstring'] = '?tag=' + tag_filter
-            try:
-                filter['verbose'] = tags.filter(slug=tag_filter).first().name 
-            except AttributeError:
-                filter['verbose'] = tag_filter
+            filter['verbose'] = next((tag['name'] for tag in tags if tag['slug'] == tag_filter), tag_filter)
         else:
             all_posts = all_posts.order_by('-first_published_at')
             
         context['filter'] = filter
         
-        paginator = Paginator(all_posts, 12)
+        paginator = get_paginator(all_posts, 12, cursor=request.GET.get('cursor'))
 
         requested_page = request.GET.get('page')
 
@@ -182,7 +185,9 @@ class BlogListingPage(SEOPage):
             posts = paginator.page(1)
         except EmptyPage:
             posts = paginator.page(paginator.num_pages)
-        
+        # card images and renditions for the whole page in a constant number of queries
+        posts.object_list = prefetch_renditions(posts.object_list, BLOG_CARD_SPECS)
+
         context['posts'] = posts
         context['categories'] = categories
         context['tags'] = tags
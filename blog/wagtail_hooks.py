@@ -3,7 +3,9 @@ from django.db.models import Count
 from taggit.models import Tag
 from wagtail import hooks
 
-from .models import BlogDetailPage
+from .categories import BlogCategory
+from .facets import update_blog_facets
+from .models import BlogDetailPage, PersonalBlogDetailPage, TechBlogDetailPage
 from .viewsets import blog_page_listing_viewset
 
 @hooks.register("register_admin_viewset")
@@ -36,6 +38,29 @@ def do_after_publish_delete_page(request, page):
     if issubclass(page.specific_class, BlogDetailPage):
         purge_unused_tags()
 
+@hooks.register('after_delete_page')
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+def update_facets_after_publish(request, page):
+    if issubclass(page.specific_class, BlogDetailPage):
+        update_blog_facets(page.specific_class)
+
+@hooks.register('after_create_snippet')
+@hooks.register('after_edit_snippet')
+def update_facets_after_category_edit(request, instance):
+    if isinstance(instance, BlogCategory):
+        update_category_facets(type(instance))
+
+@hooks.register('after_delete_snippet')
+def update_facets_after_category_delete(request, instances):
+    for category_model in {type(instance) for instance in instances if isinstance(instance, BlogCategory)}:
+        update_category_facets(category_model)
+
+def update_category_facets(category_model):
+    for page_model in (TechBlogDetailPage, PersonalBlogDetailPage):
+        if page_model._meta.get_field('categories').related_model is category_model:
+            update_blog_facets(page_model)
+
 @hooks.register("after_create_page")
 @hooks.register("after_edit_page")
 def get_wordcount(request, page):
@@ -0,0 +1,165 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache
+
+GENERATION_KEY = "__two_tier_cache_generation__"
+
+
+class TwoTierDatabaseCache(DatabaseCache):
+    """
+    DatabaseCache with a bounded per-process LRU in front of the cache table.
+
+    Reads are served from process memory where possible. Writes go to both tiers.
+    Deletes and clears bump a generation stamp held in the cache table; each worker
+    re-reads the stamp at most once every GENERATION_CHECK_INTERVAL seconds and drops
+    its local tier when the stamp has changed. A warm render therefore makes no cache
+    table queries apart from that periodic check.
+
+    Values overwritten with set() in another worker are not propagated - use delete()
+    (or the purge helpers in core.utils) where every worker needs to see the change.
+
+    Values read from the cache table are held locally for at most LOCAL_TIMEOUT
+    seconds as their remaining lifetime in the table isn't known. Values set in this
+    worker are held locally for their own timeout.
+
+    OPTIONS (in addition to the DatabaseCache options):
+        LOCAL_MAX_BYTES: size of the in-process tier in bytes of pickled data (default 32MB)
+        GENERATION_CHECK_INTERVAL: maximum staleness in seconds after a purge (default 5)
+        LOCAL_TIMEOUT: local lifetime in seconds of values read from the table (default 300)
+    """
+
+    def __init__(self, table, params):
+        super().__init__(table, params)
+        options = params.get("OPTIONS", params.get("options", {}))
+        self._local_max_bytes = int(options.get("LOCAL_MAX_BYTES", 32 * 1024 * 1024))
+        self._check_interval = float(options.get("GENERATION_CHECK_INTERVAL", 5))
+        self._local_timeout = int(options.get("LOCAL_TIMEOUT", 300))
+        self._local = OrderedDict()  # key -> (expires, pickled)
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked = 0.0
+
+    # --- local tier -------------------------------------------------------
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires, pickled = entry
+            if expires is not None and expires <= time.time():
+                self._local_pop(key)
+                return None
+            self._local.move_to_end(key)
+            return pickled
+
+    def _local_set(self, key, value, timeout):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        size = len(pickled)
+        if size > self._local_max_bytes:
+            return
+        expires = self.get_backend_timeout(timeout)
+        with self._lock:
+            self._local_pop(key)
+            self._local[key] = (expires, pickled)
+            self._local_bytes += size
+            while self._local_bytes > self._local_max_bytes:
+                oldest = next(iter(self._local))
+                self._local_pop(oldest)
+
+    def _local_pop(self, key):
+        # caller must hold the lock
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            self._local_bytes -= len(entry[1])
+
+    def _local_clear(self):
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
+
+    # --- generation stamp -------------------------------------------------
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if now - self._generation_checked < self._check_interval:
+            return
+        self._generation_checked = now
+        generation = super().get_many([GENERATION_KEY]).get(GENERATION_KEY)
+        if generation != self._generation:
+            self._local_clear()
+            self._generation = generation
+
+    def _bump_generation(self):
+        generation = time.time_ns()
+        self._base_set("set", self.make_key(GENERATION_KEY), generation, None)
+        self._generation = generation
+        self._generation_checked = time.monotonic()
+
+    # --- cache API --------------------------------------------------------
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        self._check_generation()
+        result = {}
+        missing = []
+        for key in keys:
+            pickled = self._local_get(self.make_and_validate_key(key, version=version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                result[key] = pickle.loads(pickled)
+        if missing:
+            fetched = super().get_many(missing, version=version)
+            for key, value in fetched.items():
+                self._local_set(self.make_key(key, version=version), value, self._local_timeout)
+            result.update(fetched)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        self._local_set(self.make_key(key, version=version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = super().add(key, value, timeout, version)
+        if added:
+            self._local_set(self.make_key(key, version=version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version=version)
+        with self._lock:
+            self._local_pop(made_key)
+        return super().touch(key, timeout, version)
+
+    def has_key(self, key, version=None):
+        self._check_generation()
+        if self._local_get(self.make_and_validate_key(key, version=version)) is not None:
+            return True
+        return super().has_key(key, version)
+
+    def delete(self, key, version=None):
+        made_key = self.make_key(key, version=version)
+        with self._lock:
+            self._local_pop(made_key)
+        deleted = super().delete(key, version)
+        self._bump_generation()
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        with self._lock:
+            for key in keys:
+                self._local_pop(self.make_key(key, version=version))
+        super().delete_many(keys, version)
+        self._bump_generation()
+
+    def clear(self):
+        self._local_clear()
+        super().clear()
+        self._bump_generation()
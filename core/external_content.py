@@ -0,0 +1,259 @@
+import hashlib
+import html
+import ipaddress
+import re
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+METADATA_CACHE_KEY = "external-content:{}"
+IMAGE_CHECK_CACHE_KEY = "image-url-check:{}"
+IMAGE_CHECK_MAX_WORKERS = 8
+HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+HEAD_START = re.compile(rb"<head[\s>]", re.IGNORECASE)
+CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+CHUNK_SIZE = 16 * 1024
+
+_session = None
+
+
+def get_http_session():
+    """
+    Shared requests session for outbound calls made while serving requests.
+    Keeps connections alive per host so repeat lookups skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = (
+            "Mozilla/5.0 (compatible; metadata-fetcher; +https://www.enzedonline.com)"
+        )
+        _session = session
+    return _session
+
+
+def get_http_timeout():
+    # (connect, read) seconds - read applies to each chunk, not the whole body
+    return getattr(settings, "EXTERNAL_CONTENT_TIMEOUT", (3.05, 5))
+
+
+class NoHeadError(Exception):
+    pass
+
+
+class NonPublicUrlError(Exception):
+    pass
+
+
+def open_public_url(url):
+    """
+    Streamed GET of url, following up to EXTERNAL_CONTENT_MAX_REDIRECTS redirects by
+    hand so that every hop is checked with is_public_url before it is requested.
+    Raises NonPublicUrlError for a hop that fails the check.
+    """
+    session = get_http_session()
+    max_redirects = getattr(settings, "EXTERNAL_CONTENT_MAX_REDIRECTS", 5)
+    for _ in range(max_redirects + 1):
+        if not is_public_url(url):
+            raise NonPublicUrlError(url)
+        response = session.get(url, stream=True, allow_redirects=False, timeout=get_http_timeout())
+        if not response.is_redirect:
+            return response
+        url = urljoin(response.url, response.headers["Location"])
+        response.close()
+    raise requests.TooManyRedirects(f"Exceeded {max_redirects} redirects.")
+
+
+def fetch_head(url):
+    """
+    Stream a page and return (resolved url, <head> markup).
+    Reading stops at </head> or after EXTERNAL_CONTENT_MAX_BYTES, whichever is first.
+    Stopping early leaves the body unread, so the connection is closed rather than
+    returned to the pool - only the bytes up to </head> are downloaded.
+    """
+    max_bytes = getattr(settings, "EXTERNAL_CONTENT_MAX_BYTES", 512 * 1024)
+    buffer = bytearray()
+    with open_public_url(url) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            # search from just before the new chunk in case the tag is split across chunks
+            search_from = max(len(buffer) - 8, 0)
+            buffer.extend(chunk)
+            if HEAD_END.search(buffer, search_from) or len(buffer) >= max_bytes:
+                break
+        resolved_url = response.url
+        encoding = response.encoding if "charset" in response.headers.get("Content-Type", "") else None
+
+    start = HEAD_START.search(buffer)
+    if not start:
+        raise NoHeadError
+    end = HEAD_END.search(buffer, start.start())
+    head = bytes(buffer[start.start():end.end() if end else len(buffer)])
+
+    if not encoding:
+        charset = CHARSET.search(head)
+        encoding = charset.group(1).decode("ascii") if charset else "utf-8"
+    try:
+        return resolved_url, head.decode(encoding, errors="replace")
+    except LookupError:
+        return resolved_url, head.decode("utf-8", errors="replace")
+
+
+def extract_metadata(soup, keys):
+    for key in keys:
+        meta_tag = soup.find("meta", attrs={"property": key})
+        if not meta_tag:
+            meta_tag = soup.find("meta", attrs={"itemprop": key})
+        if not meta_tag:
+            meta_tag = soup.find("meta", attrs={"name": key})
+        if meta_tag:
+            if keys[0] == "og:title" and not meta_tag.get("content"):
+                title_tag = soup.find("title")
+                if title_tag:
+                    return title_tag.string
+            return meta_tag.get("content")
+
+    if keys[0] == 'meta[name="description"]':
+        description_tag = soup.find("meta", attrs={"name": "description"})
+        if description_tag:
+            return description_tag.get("content")
+
+    if keys[0] == "og:title":
+        title_tag = soup.find("title")
+        if title_tag:
+            return title_tag.string
+
+    return None
+
+
+def parse_head_metadata(url, head):
+    head_soup = BeautifulSoup(head, "html.parser")
+
+    title = extract_metadata(head_soup, ["og:title", "itemprop:name", "twitter:title"])
+
+    description = extract_metadata(
+        head_soup,
+        [
+            "og:description",
+            "itemprop:description",
+            "twitter:description",
+            'meta[name="description"]',
+        ],
+    )
+    if description:
+        description = html.unescape(description)
+
+    image = extract_metadata(head_soup, ["og:image", "itemprop:image", "twitter:image"]) or ""
+
+    # attempt to fix relative image url
+    if image and image.startswith("/"):
+        parsed_url = urlparse(url)
+        image = f"{parsed_url.scheme}://{parsed_url.netloc}{image}"
+
+    return {
+        "url": url,
+        "title": str(title) if title is not None else None,
+        "description": description,
+        "image": image,
+    }
+
+
+def _url_hash(url):
+    return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+
+def _metadata_key(url):
+    return METADATA_CACHE_KEY.format(_url_hash(url))
+
+
+def get_external_metadata(url):
+    """
+    Return {'url', 'title', 'description', 'image'} for an external article.
+    Results are cached under both the requested and resolved url for
+    EXTERNAL_CONTENT_CACHE_TIMEOUT seconds. Raises requests exceptions and
+    NoHeadError on failure - failures are not cached.
+    """
+    cache = caches["default"]
+    metadata = cache.get(_metadata_key(url))
+    if metadata is not None:
+        return metadata
+
+    resolved_url, head = fetch_head(url)
+    metadata = parse_head_metadata(resolved_url, head)
+
+    timeout = getattr(settings, "EXTERNAL_CONTENT_CACHE_TIMEOUT", 60 * 60 * 6)
+    cache.set_many(
+        {_metadata_key(url): metadata, _metadata_key(resolved_url): metadata}, timeout
+    )
+    return metadata
+
+
+def is_public_url(url):
+    """
+    True for an http(s) url whose host resolves to public addresses only - checks
+    made on behalf of editors must not reach the server's own or private networks.
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.scheme not in ("http", "https") or not parsed_url.hostname:
+        return False
+    try:
+        addresses = socket.getaddrinfo(parsed_url.hostname, parsed_url.port or None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+    return all(ipaddress.ip_address(address[4][0].split("%")[0]).is_global for address in addresses)
+
+
+def is_image_url(url):
+    """
+    HEAD request - True if the url serves an image. Redirects are not followed and
+    urls on private or loopback addresses are not requested (see is_public_url).
+    """
+    if not is_public_url(url):
+        return False
+    try:
+        response = get_http_session().head(url, allow_redirects=False, timeout=get_http_timeout())
+        return response.status_code == 200 and response.headers.get(
+            "Content-Type", ""
+        ).startswith("image/")
+    except requests.RequestException:
+        return False
+
+
+def check_image_urls(urls):
+    """
+    Return {url: bool} for an iterable of urls, True where the url serves an image.
+    Cached results are used where present; the rest are checked concurrently over the
+    shared session. Valid and invalid results are cached with separate timeouts
+    (IMAGE_URL_VALID_CACHE_TIMEOUT, IMAGE_URL_INVALID_CACHE_TIMEOUT) so a broken
+    link that gets fixed is picked up quickly.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    cache = caches["default"]
+    keys = {url: IMAGE_CHECK_CACHE_KEY.format(_url_hash(url)) for url in urls}
+    cached = cache.get_many(list(keys.values()))
+    results = {url: cached[key] for url, key in keys.items() if key in cached}
+
+    unchecked = [url for url in urls if url not in results]
+    if unchecked:
+        with ThreadPoolExecutor(max_workers=min(IMAGE_CHECK_MAX_WORKERS, len(unchecked))) as executor:
+            checked = dict(zip(unchecked, executor.map(is_image_url, unchecked)))
+        valid_timeout = getattr(settings, "IMAGE_URL_VALID_CACHE_TIMEOUT", 60 * 60 * 24)
+        invalid_timeout = getattr(settings, "IMAGE_URL_INVALID_CACHE_TIMEOUT", 60 * 5)
+        for valid in (True, False):
+            values = {keys[url]: valid for url, result in checked.items() if result is valid}
+            if values:
+                cache.set_many(values, valid_timeout if valid else invalid_timeout)
+        results.update(checked)
+
+    return {url: results[url] for url in urls}
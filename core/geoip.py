@@ -0,0 +1,153 @@
+import ipaddress
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+
+# File layout (all integers big-endian):
+#   header: MAGIC, uint32 IPv4 record count, uint32 IPv6 record count
+#   IPv4 records: start (4 bytes), end (4 bytes), country code (2 bytes ascii)
+#   IPv6 records: start (16 bytes), end (16 bytes), country code (2 bytes ascii)
+# Records are sorted by start and don't overlap. Packed big-endian addresses sort
+# the same as the addresses themselves so keys are compared as bytes.
+MAGIC = b"IPCC\x01"
+HEADER = struct.Struct(f">{len(MAGIC)}sII")
+RELOAD_CHECK_INTERVAL = 60
+
+
+def get_table_path():
+    return getattr(
+        settings, "IP_COUNTRY_TABLE", os.path.join(settings.BASE_DIR, "data", "ip-country.bin")
+    )
+
+
+class _RecordKeys:
+    """Sequence view of the start address of each fixed width record, for bisect"""
+
+    def __init__(self, buffer, offset, count, width):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.width = width
+        self.stride = 2 * width + 2
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = self.offset + index * self.stride
+        return self.buffer[start:start + self.width]
+
+    def record(self, index):
+        start = self.offset + index * self.stride + self.width
+        return (
+            self.buffer[start:start + self.width],
+            self.buffer[start + self.width:start + self.width + 2].decode("ascii"),
+        )
+
+
+class IPCountryTable:
+    """
+    Memory-mapped, read-only IP range table. Lookups are a binary search over the
+    mapped records - nothing is loaded into python objects up front and pages of the
+    file are shared between worker processes by the OS.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, v4_count, v6_count = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an IP country table")
+        self.ipv4 = _RecordKeys(self.mmap, HEADER.size, v4_count, 4)
+        self.ipv6 = _RecordKeys(self.mmap, HEADER.size + v4_count * self.ipv4.stride, v6_count, 16)
+
+    def lookup(self, ip):
+        """Return the ISO country code for an address, None if not in the table"""
+        address = ipaddress.ip_address(ip)
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        records = self.ipv4 if address.version == 4 else self.ipv6
+        packed = address.packed
+        index = bisect_right(records, packed) - 1
+        if index < 0:
+            return None
+        end, country = records.record(index)
+        return country if packed <= end else None
+
+    def close(self):
+        self.mmap.close()
+
+
+def write_table(path, ranges):
+    """
+    Write an iterable of (start, end, country) ipaddress ranges to path, replacing
+    any existing table atomically. Adjacent ranges for the same country are merged
+    and ranges overlapping an earlier one are dropped.
+    Returns (IPv4 count, IPv6 count).
+    """
+    tables = {4: [], 6: []}
+    for start, end, country in sorted(ranges, key=lambda r: (r[0].version, r[0])):
+        records = tables[start.version]
+        if records:
+            last_start, last_end, last_country = records[-1]
+            if start <= last_end:
+                continue
+            if country == last_country and int(start) == int(last_end) + 1:
+                records[-1] = (last_start, end, country)
+                continue
+        records.append((start, end, country))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(tables[4]), len(tables[6])))
+        for version in (4, 6):
+            for start, end, country in tables[version]:
+                f.write(start.packed + end.packed + country.encode("ascii"))
+    os.replace(temp_path, path)
+    return len(tables[4]), len(tables[6])
+
+
+_table = None
+_table_checked = 0.0
+_lock = threading.Lock()
+
+
+def get_table():
+    """
+    Return the shared IPCountryTable, or None if no table has been built.
+    The file is re-mapped if it has been rebuilt (checked every RELOAD_CHECK_INTERVAL seconds).
+    """
+    global _table, _table_checked
+    now = time.monotonic()
+    if _table is not None and now - _table_checked < RELOAD_CHECK_INTERVAL:
+        return _table
+    with _lock:
+        _table_checked = now
+        path = get_table_path()
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            _table = None
+            return None
+        if _table is None or _table.path != path or _table.mtime != mtime:
+            _table = IPCountryTable(path)
+        return _table
+
+
+def lookup_country(ip):
+    """ISO country code for an IP address from the local table, None if unknown"""
+    table = get_table()
+    if table is None:
+        return None
+    try:
+        return table.lookup(ip)
+    except ValueError:
+        return None
@@ -0,0 +1,58 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.detail_page import BlogDetailPage
+from core.streamfield_text import extract_streamfield_text
+from core.utils import count_words, get_streamfield_text
+from goneforawander.travel.blog_detail import TravelBlogPage
+
+STRIP_TAGS = ["style", "script", "code"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render-based get_streamfield_text() with the render-free "
+        "extract_streamfield_text() on the longest blog and travel posts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=10, help="Number of longest posts to time")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per post for each extractor")
+
+    def time_call(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - start) / repeat, result
+
+    def handle(self, *args, **options):
+        pages = []
+        for model in (BlogDetailPage, TravelBlogPage):
+            for page in model.objects.live().specific():
+                pages.append((len(json.dumps(list(page.body.raw_data))), page))
+        pages.sort(key=lambda x: x[0], reverse=True)
+
+        total_render = total_extract = 0
+        for size, page in pages[:options["posts"]]:
+            render_time, render_text = self.time_call(
+                lambda: get_streamfield_text(page.body, strip_tags=STRIP_TAGS), options["repeat"]
+            )
+            # no revision_id so every run is timed uncached
+            extract_time, extract_text = self.time_call(
+                lambda: extract_streamfield_text(page.body, strip_tags=STRIP_TAGS), options["repeat"]
+            )
+            total_render += render_time
+            total_extract += extract_time
+            self.stdout.write(
+                f"{page.title[:40]:40} {size:>8} bytes | "
+                f"render {render_time * 1000:8.1f}ms {count_words(render_text):>6} words | "
+                f"extract {extract_time * 1000:7.1f}ms {count_words(extract_text):>6} words"
+            )
+
+        if total_extract:
+            self.stdout.write(self.style.SUCCESS(
+                f"Total render {total_render * 1000:.1f}ms, extract {total_extract * 1000:.1f}ms "
+                f"({total_render / total_extract:.1f}x)"
+            ))
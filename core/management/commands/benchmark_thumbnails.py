@@ -0,0 +1,121 @@
+import io
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageOps
+from willow.plugins.pillow import PillowImage
+
+from core.renditions import GOOGLE_THUMBNAIL_SPECS
+from core.thumbnails import thumbnail
+
+
+def legacy_thumbnail(image, width, height):
+    """The thumbnail operation before it worked on the Pillow image directly"""
+    img = Image.frombytes('RGB', image.get_size(), image.to_buffer_rgb().data, 'raw')
+    if img.width/img.height == width/height:
+        return PillowImage(img.resize((width, height)))
+    thumb = Image.new('RGB', (width, height), (255, 255, 255))
+    thumb.putalpha(0)
+    if width/height < img.width/img.height:
+        resized_original = img.resize((width, round(img.height * width/img.width)))
+        thumb.paste(resized_original, (0, (height-resized_original.height)//2))
+    else:
+        resized_original = img.resize((round(img.width * height/img.height), height))
+        thumb.paste(resized_original, ((width-resized_original.width)//2, 0))
+    return PillowImage(thumb)
+
+
+def sample_jpeg(width, height):
+    img = Image.merge("RGB", [
+        Image.linear_gradient("L").resize((width, height)),
+        Image.effect_noise((width, height), 64),
+        Image.linear_gradient("L").rotate(90).resize((width, height)),
+    ])
+    output = io.BytesIO()
+    img.save(output, "JPEG", quality=90)
+    return output.getvalue()
+
+
+def sample_png16(width, height):
+    """16 bit grayscale png - resampled only after conversion"""
+    img = Image.linear_gradient("L").resize((width, height)).convert("I;16")
+    output = io.BytesIO()
+    img.save(output, "PNG")
+    return output.getvalue()
+
+
+SAMPLES = {"jpeg": sample_jpeg, "png16": sample_png16}
+
+
+def describe(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return f"source {img.format} {img.width}x{img.height} {img.mode}"
+
+
+def memory_kb(field):
+    """VmRSS / VmHWM (peak) of this process in KB - Linux only"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+
+
+def run_case(data, case, width, height):
+    """Time and peak memory of one thumbnail, from the encoded file to the thumbnail"""
+    # reset the peak to the current resident size
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    start_rss = memory_kb("VmRSS")
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    if case == "direct":
+        # opened lazily - the operation can draft the JPEG decode
+        thumbnail(PillowImage(img), width, height)
+    else:
+        # as wagtail's Filter.run hands it over: decoded and auto-oriented
+        img.load()
+        willow = PillowImage(ImageOps.exif_transpose(img))
+        (legacy_thumbnail if case == "legacy" else thumbnail)(willow, width, height)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, (memory_kb("VmHWM") - start_rss) / 1024
+
+
+class Command(BaseCommand):
+    help = "Time the thumbnail image operation and its peak memory, per spec, against the previous version"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Source image (default a generated 6000x4000 image, see --sample)")
+        parser.add_argument("--sample", choices=SAMPLES, default="jpeg", help="Generated source image type")
+        parser.add_argument("--specs", nargs="+", default=GOOGLE_THUMBNAIL_SPECS, help="Thumbnail specs to time")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per spec and version")
+
+    def handle(self, *args, **options):
+        # each run in a fresh process so freed pixel buffers held by the allocator
+        # don't hide the next run's peak
+        pool = multiprocessing.get_context("fork").Pool(1, maxtasksperchild=1)
+        try:
+            if options["file"]:
+                with open(options["file"], "rb") as f:
+                    data = f.read()
+            else:
+                data = pool.apply(SAMPLES[options["sample"]], (6000, 4000))
+            # opened in a worker too - pool processes forked after the parent has
+            # opened a png can hang
+            self.stdout.write(pool.apply(describe, (data,)))
+
+            for spec in options["specs"]:
+                width, height = map(int, spec.split("|")[0].split("-")[1].split("x"))
+                results = []
+                for case in ("legacy", "current", "direct"):
+                    runs = [
+                        pool.apply(run_case, (data, case, width, height))
+                        for _ in range(options["repeat"])
+                    ]
+                    elapsed = min(run[0] for run in runs)
+                    peak = max(run[1] for run in runs)
+                    results.append(f"{case} {elapsed:7.1f}ms {peak:6.1f}MB")
+                self.stdout.write(f"{spec:<30} | " + " | ".join(results))
+        finally:
+            pool.close()
+            pool.join()
@@ -0,0 +1,67 @@
+import csv
+import ipaddress
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.geoip import get_table_path, write_table
+
+IPV4_MAX = 2 ** 32 - 1
+
+
+def parse_address(value, as_ipv6=False):
+    """Accept dotted/colon notation or the integer form used by ip2location style files"""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return ipaddress.IPv6Address(number) if (as_ipv6 or number > IPV4_MAX) else ipaddress.IPv4Address(number)
+    return ipaddress.ip_address(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the memory-mapped IP to country table used by the user_country view "
+        "from one or more CSV range files (start, end, country code). Addresses may "
+        "be IPv4/IPv6 notation or integers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_files", nargs="+", help="CSV files of IP ranges")
+        parser.add_argument("--output", help="Table file (default settings.IP_COUNTRY_TABLE)")
+        parser.add_argument("--country-column", type=int, default=2, help="Zero based column of the country code")
+        parser.add_argument("--ipv6", action="store_true", help="Treat integer addresses as IPv6")
+
+    def read_ranges(self, path, country_column, as_ipv6):
+        with open(path, newline="", encoding="utf-8") as f:
+            for line_number, row in enumerate(csv.reader(f), start=1):
+                try:
+                    start = parse_address(row[0], as_ipv6)
+                    end = parse_address(row[1], as_ipv6)
+                    country = row[country_column].strip().upper()
+                except (IndexError, ValueError):
+                    # header rows and malformed lines
+                    continue
+                if len(country) != 2 or not country.isalpha() or country == "ZZ":
+                    continue
+                # IPv4-mapped IPv6 ranges (::ffff:0:0/96) are stored as IPv4
+                if start.version == 6 and start.ipv4_mapped and end.ipv4_mapped:
+                    start, end = start.ipv4_mapped, end.ipv4_mapped
+                if start.version != end.version or start > end:
+                    self.stderr.write(f"{path}:{line_number} skipped invalid range {row[0]} - {row[1]}")
+                    continue
+                yield start, end, country
+
+    def handle(self, *args, **options):
+        ranges = []
+        for path in options["csv_files"]:
+            try:
+                ranges.extend(self.read_ranges(path, options["country_column"], options["ipv6"]))
+            except OSError as e:
+                raise CommandError(e)
+        if not ranges:
+            raise CommandError("No valid ranges found")
+
+        output = options["output"] or get_table_path()
+        ipv4_count, ipv6_count = write_table(output, ranges)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {ipv4_count} IPv4 and {ipv6_count} IPv6 ranges to {output}"
+        ))
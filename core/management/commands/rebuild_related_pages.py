@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.related import get_related_page_models, update_related_pages
+
+
+class Command(BaseCommand):
+    help = "Rebuild the related pages index (recipes) from page tags"
+
+    def handle(self, *args, **options):
+        for model in get_related_page_models():
+            update_related_pages(model)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt related pages for {model._meta.verbose_name}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from wagtail.models import Site
+
+from core.sitemap import rebuild_sitemap
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed sitemap entries from the page tree"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--site", type=int, help="Rebuild one site only (site id)")
+
+    def handle(self, *args, **options):
+        sites = Site.objects.select_related("root_page")
+        if options["site"]:
+            sites = sites.filter(pk=options["site"])
+        for site in sites:
+            rebuild_sitemap(site)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt sitemap for {site}"))
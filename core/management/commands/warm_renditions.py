@@ -0,0 +1,25 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+
+from core.renditions import (BRAND_LOGO_SPECS, get_page_rendition_specs,
+                             warm_renditions)
+from site_settings.models import Brand
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue every rendition the templates need for live pages and brand logos. "
+        "Renditions that already exist are skipped by the rendition workers."
+    )
+
+    def handle(self, *args, **options):
+        image_specs = defaultdict(set)
+        for page in Page.objects.live().defer_streamfields().specific().iterator(500):
+            for image_id, specs in get_page_rendition_specs(page).items():
+                image_specs[image_id].update(specs)
+        for logo_id in Brand.objects.exclude(logo=None).values_list("logo_id", flat=True):
+            image_specs[logo_id].update(BRAND_LOGO_SPECS)
+        warm_renditions(image_specs)
+        self.stdout.write(self.style.SUCCESS(f"Queued renditions for {len(image_specs)} images"))
@@ -0,0 +1,16 @@
+from .page_cache import get_cached_response
+
+
+class PageResponseCacheMiddleware:
+    """
+    Serve cached anonymous page responses (see core.page_cache) before the request
+    reaches wagtail's page routing. Pages opt in with `cache_response = True`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = get_cached_response(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
@@ -1,4 +1,6 @@
+from collections import defaultdict
 from datetime import datetime
+from types import SimpleNamespace
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -11,6 +13,7 @@ from wagtail.models import Locale, Page
 from wagtail.search import index
 from wagtailmetadata.models import WagtailImageMetadataMixin
 
+from core.page_cache import cache_page_response, get_response_generation
 from core.widgets import CharLimitTextArea, CharLimitTextInput
 
 
@@ -21,6 +24,60 @@ def get_image_model_string():
         image_model = 'wagtailimages.Image'
     return image_model
 
+def get_alternates_for_pages(pages, request=None):
+    """
+    Return {page.pk: alternates} for many pages in a constant number of queries.
+    Translations are fetched in one query grouped by translation_key and site root paths
+    are resolved once. Alternates are a list of {'lang_code', 'location'} dicts ending
+    with the x-default entry, or None for untranslated pages.
+    If request is given (any object will do), results are memoised on it so the head
+    template, structured data and sitemap code share the work.
+    """
+    pages = list(pages)
+    cache_object = request if request is not None else SimpleNamespace()
+    memo = getattr(cache_object, '_page_alternates', None)
+    if memo is None:
+        memo = cache_object._page_alternates = {}
+
+    pending = [page for page in pages if page.pk not in memo]
+    if pending:
+        default_locale_id = Locale.get_default().pk
+        translations = defaultdict(list)
+        for page in Page.objects.live().filter(
+            translation_key__in={page.translation_key for page in pending}
+        ).select_related('locale').order_by('path'):
+            translations[page.translation_key].append(page)
+
+        for page in pending:
+            trans_pages = translations[page.translation_key]
+            # inclusive of the page itself even if it's not live (e.g. previews)
+            if page.pk not in {trans_page.pk for trans_page in trans_pages}:
+                trans_pages = sorted(trans_pages + [page], key=lambda trans_page: trans_page.path)
+            memo[page.pk] = _build_alternates(trans_pages, default_locale_id, cache_object)
+
+    return {page.pk: memo[page.pk] for page in pages}
+
+def _build_alternates(trans_pages, default_locale_id, cache_object):
+    if len(trans_pages) < 2:
+        return None
+    alt = []
+    x_default = None
+    for page in trans_pages:
+        alt.append({
+            'lang_code': page.locale.language_code,
+            'location': page.get_full_url(cache_object)
+        })
+        if page.locale_id == default_locale_id:
+            x_default = page.get_url_parts(cache_object)
+    # page not translated to default language, use first trans_page instead
+    if not x_default:
+        x_default = trans_pages[0].get_url_parts(cache_object)
+    # x-default - strip the language component from the url for the default-lang page
+    # https://example.com/en/something/ -> https://example.com/something/
+    x_default = f"{x_default[1]}/{'/'.join(x_default[2].split('/')[2:])}"
+    alt.append({'lang_code': 'x-default', 'location': x_default})
+    return alt
+
 class SEOPageMixin(index.Indexed, WagtailImageMetadataMixin, models.Model):
     search_image = models.ForeignKey(
         get_image_model_string(),
@@ -102,41 +159,19 @@ class SEOPageMixin(index.Indexed, WagtailImageMetadataMixin, models.Model):
     def get_meta_image(self):
         return self.search_image
 
-    def get_alternates(self):
-        default_locale = Locale.get_default()
-        x_default = None
-
-        trans_pages = self.get_translations(inclusive=True)
-        if trans_pages.count() > 1:
-            alt = []
-            for page in trans_pages:
-                alt.append({
-                    'lang_code': page.locale.language_code,
-                    'location': page.get_full_url()
-                })
-                if page.locale == default_locale:
-                    x_default = page.get_url_parts()
-            # page not translated to default language, use first trans_page instead
-            if not x_default:
-                x_default = trans_pages.first().get_url_parts()
-            # x-default - strip the language component from the url for the default-lang page
-            # https://example.com/en/something/ -> https://example.com/something/
-            x_default = f"{x_default[1]}/{'/'.join(x_default[2].split('/')[2:])}"
-            alt.append({'lang_code': 'x-default', 'location': x_default})
-            return alt
-        else:
-            return None
+    def get_alternates(self, request=None):
+        return get_alternates_for_pages([self], request)[self.pk]
 
     @property
     def lastmod(self):
         return self.last_published_at or self.latest_revision_created_at
 
-    def get_sitemap_urls(self):
+    def get_sitemap_urls(self, request=None):
         if self.search_engine_index:
             url_item = {
-                "location": self.full_url,
+                "location": self.get_full_url(request),
                 "lastmod": self.lastmod,
-                "alternates": self.get_alternates()
+                "alternates": self.get_alternates(request)
             }
             if self.search_engine_changefreq:
                 url_item["changefreq"] = self.search_engine_changefreq
@@ -180,6 +215,8 @@ class SEOPageMixin(index.Indexed, WagtailImageMetadataMixin, models.Model):
 
 class SEOPage(SEOPageMixin, Page):
     og_type = 'website'
+    # opt in to the anonymous full response cache (core.page_cache)
+    cache_response = False
 
     search_fields = Page.search_fields + [
         index.SearchField('summary'),
@@ -203,3 +240,76 @@ class SEOPage(SEOPageMixin, Page):
             context['cache_name'] = self.slug
             context['cache_date'] = self.last_published_at
         return context
+
+    def serve(self, request, *args, **kwargs):
+        generation = get_response_generation(self, request)
+        response = super().serve(request, *args, **kwargs)
+        if generation is not None:
+            response = cache_page_response(self, request, response, generation)
+        return response
+
+
+class FragmentCacheKey(models.Model):
+    """
+    Registry of template fragment cache keys written by the {% cache %} tag.
+    Lets fragments be purged by page slug, fragment name or group with a primary
+    key delete on the cache table rather than a LIKE scan over every cache row.
+    """
+    MENU = 'menu'
+    FOOTER = 'footer'
+
+    cache_key = models.CharField(max_length=255, primary_key=True)
+    slug = models.CharField(max_length=255, db_index=True)
+    fragment = models.CharField(max_length=255, db_index=True)
+    group = models.CharField(max_length=20, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Fragment Cache Key")
+
+    def __str__(self):
+        return self.cache_key
+
+
+class SitemapEntry(models.Model):
+    """
+    Precomputed sitemap url for a live, public page. Maintained from the publish,
+    unpublish, move and delete hooks (see core.sitemap) so sitemap requests don't
+    walk the page tree.
+    """
+    site = models.ForeignKey('wagtailcore.Site', on_delete=models.CASCADE, related_name='+')
+    page = models.ForeignKey('wagtailcore.Page', on_delete=models.CASCADE, related_name='+')
+    path = models.CharField(max_length=255, db_index=True)
+    location = models.CharField(max_length=2048)
+    lastmod = models.DateTimeField(null=True, blank=True)
+    changefreq = models.CharField(max_length=25, blank=True)
+    priority = models.DecimalField(max_digits=2, decimal_places=1, null=True, blank=True)
+    alternates = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Sitemap Entry")
+        verbose_name_plural = _("Sitemap Entries")
+        indexes = [models.Index(fields=['site', 'path'])]
+
+    def __str__(self):
+        return self.location
+
+
+class RelatedPage(models.Model):
+    """
+    Precomputed top related pages for a page by tag overlap, newest first on ties.
+    Rebuilt for the affected pages when a page is published, unpublished or deleted
+    (see core.related) so 'related' lists are one indexed lookup.
+    """
+    page = models.ForeignKey('wagtailcore.Page', on_delete=models.CASCADE, related_name='+')
+    related_page = models.ForeignKey(
+        'wagtailcore.Page', on_delete=models.CASCADE, related_name='related_page_entries'
+    )
+    score = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = _("Related Page")
+        indexes = [models.Index(fields=['page', 'rank'])]
+
+    def __str__(self):
+        return f"{self.page_id} -> {self.related_page_id} ({self.score})"
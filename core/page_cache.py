@@ -0,0 +1,202 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_response_headers
+from django.utils.http import http_date
+
+# url digest -> (page id, locale id) of the page last served there
+ROUTE_KEY = "page-route:{}"
+# page id -> generation stamp, deleted to evict every response of the page
+GENERATION_KEY = "page-response-generation:{}"
+# generation stamp of the site wide parts (menus, footer, site settings), deleted to
+# evict every response
+SITE_GENERATION_KEY = "page-response-generation:site"
+# page id, locale id, site generation, page generation, url digest
+RESPONSE_KEY = "page-response:{}:{}:{}:{}:{}"
+# headers that must never be replayed from the cache
+EXCLUDED_HEADERS = {"set-cookie", "content-length"}
+
+
+def _response_cache():
+    return caches[getattr(settings, "FULL_PAGE_CACHE_ALIAS", "default")]
+
+
+def _cache_query(request):
+    """
+    The query string in a fixed order, None if it has parameters other than
+    FULL_PAGE_CACHE_QUERY_PARAMS - those requests are not cached.
+    """
+    allowed = getattr(settings, "FULL_PAGE_CACHE_QUERY_PARAMS", ())
+    if any(name not in allowed for name in request.GET):
+        return None
+    return urlencode(sorted(request.GET.lists()), doseq=True)
+
+
+def _url_digest(request, query):
+    url = f"{request.get_host()}{request.path}?{query}"
+    return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+
+def _is_anonymous_get(request):
+    """
+    Cheap test made before routing: GET/HEAD of a page url (wagtail appends the
+    slash) with no session cookie. Requests carrying a session cookie always take
+    the normal path.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and request.path.endswith("/")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not settings.DEBUG
+        and _cache_query(request) is not None
+    )
+
+
+def _get_or_start_generation(cache, key, timeout):
+    generation = time.time_ns()
+    if not cache.add(key, generation, timeout):
+        # started by a concurrent request
+        generation = cache.get(key)
+    return generation
+
+
+def get_cached_response(request):
+    """
+    Return a cached page response (or 304/412) for an anonymous GET request,
+    None if nothing is cached. The page is looked up from the host, path and query
+    so no page routing or database access is needed.
+    """
+    if not _is_anonymous_get(request):
+        return None
+    cache = _response_cache()
+    digest = _url_digest(request, _cache_query(request))
+    route_key = ROUTE_KEY.format(digest)
+    # one round trip for urls that were never cached
+    found = cache.get_many([route_key, SITE_GENERATION_KEY])
+    route, site_generation = found.get(route_key), found.get(SITE_GENERATION_KEY)
+    if not route or site_generation is None:
+        return None
+    page_id, locale_id = route
+    generation = cache.get(GENERATION_KEY.format(page_id))
+    if generation is None:
+        return None
+    entry = cache.get(RESPONSE_KEY.format(page_id, locale_id, site_generation, generation, digest))
+    if not entry:
+        return None
+
+    response = HttpResponse(entry["content"], status=200)
+    for header, value in entry["headers"]:
+        response.headers[header] = value
+    response["X-Page-Cache"] = "hit"
+    return get_conditional_response(
+        request,
+        etag=entry["etag"],
+        last_modified=entry["last_modified"],
+        response=response,
+    )
+
+
+def get_response_generation(page, request):
+    """
+    (site generation, page generation) for the page's responses, each started if
+    there is none. None if the request isn't cacheable. Read before the page is
+    rendered, so a response rendered while the page or a menu is changed is stored
+    under a generation the change removed.
+    """
+    if not (_is_anonymous_get(request) and page.cache_response):
+        return None
+    cache = _response_cache()
+    key = GENERATION_KEY.format(page.pk)
+    found = cache.get_many([SITE_GENERATION_KEY, key])
+    timeout = getattr(settings, "FULL_PAGE_CACHE_TIMEOUT", 60 * 60 * 24)
+    site_generation = found.get(SITE_GENERATION_KEY)
+    if site_generation is None:
+        site_generation = _get_or_start_generation(cache, SITE_GENERATION_KEY, timeout)
+    generation = found.get(key)
+    if generation is None:
+        generation = _get_or_start_generation(cache, key, timeout)
+    if site_generation is None or generation is None:
+        return None
+    return site_generation, generation
+
+
+def cache_page_response(page, request, response, generation):
+    """
+    Store a rendered page response for anonymous visitors and add strong ETag and
+    Last-Modified headers. The entry is keyed on page id, locale, response generation
+    (see get_response_generation) and the url - the ETag is derived from the page id,
+    locale, query string, last_published_at and body so it changes with any change
+    to the bytes served.
+    Returns the (possibly 304) response to send.
+    """
+    if not (
+        generation is not None
+        and not getattr(request, "is_preview", False)
+        and not request.user.is_authenticated
+        and page.live
+        and page.last_published_at
+        and response.status_code == 200
+    ):
+        return response
+
+    if hasattr(response, "render") and not response.is_rendered:
+        response.render()
+
+    # anything that sets a cookie or uses the csrf token is per visitor
+    if response.cookies or request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return response
+    if "private" in response.get("Cache-Control", ""):
+        return response
+
+    query = _cache_query(request)
+    last_modified = int(page.last_published_at.timestamp())
+    identity = f"{page.pk}|{page.locale_id}|{query}|{last_modified}"
+    digest = hashlib.sha1(identity.encode("utf-8"))
+    digest.update(response.content)
+    etag = f'"{digest.hexdigest()}"'
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_response_headers(response, cache_timeout=0)
+
+    timeout = getattr(settings, "FULL_PAGE_CACHE_TIMEOUT", 60 * 60 * 24)
+    url_digest = _url_digest(request, query)
+    _response_cache().set_many(
+        {
+            ROUTE_KEY.format(url_digest): (page.pk, page.locale_id),
+            RESPONSE_KEY.format(page.pk, page.locale_id, *generation, url_digest): {
+                "last_modified": last_modified,
+                "etag": etag,
+                "content": response.content,
+                "headers": [
+                    (header, value)
+                    for header, value in response.headers.items()
+                    if header.lower() not in EXCLUDED_HEADERS
+                ],
+            },
+        },
+        timeout,
+    )
+
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
+
+
+def purge_page_responses(*page_ids):
+    """
+    Evict all cached responses for the given page ids - without their generation the
+    stored responses can't be looked up and expire in the cache table.
+    """
+    if not page_ids:
+        return
+    _response_cache().delete_many([GENERATION_KEY.format(page_id) for page_id in page_ids])
+
+
+def purge_site_page_responses():
+    """Evict every cached response - for changes to menus, footer or site settings"""
+    _response_cache().delete(SITE_GENERATION_KEY)
@@ -0,0 +1,232 @@
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import (EmptyResultSet, FieldDoesNotExist,
+                                    ValidationError)
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Lookup, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+KEYSET_PAGES_KEY = "keyset-pages:{}"
+
+
+def _json_default(value):
+    # full precision - DjangoJSONEncoder drops datetime microseconds, which breaks equality on the key
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    return urlsafe_base64_encode(json.dumps(list(values), default=_json_default).encode("utf-8"))
+
+
+def decode_cursor(cursor):
+    """The list of values in a cursor made by encode_cursor, None if it is malformed"""
+    try:
+        values = json.loads(urlsafe_base64_decode(cursor))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def key_from_values(model, ordering, values):
+    """Convert decoded cursor values to the ordering fields' python values, None if they don't fit"""
+    if len(values) != len(ordering):
+        return None
+    key = []
+    try:
+        for (name, _), value in zip(ordering, values):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # annotation (e.g. match_count) - json keeps numbers as they were
+                key.append(value)
+            else:
+                key.append(field.to_python(value))
+    except (ValueError, TypeError, ValidationError):
+        return None
+    return tuple(key)
+
+
+def order_by_keyset(queryset, ordering):
+    # pk tie-break so the key of each row is unique and its position stable
+    return queryset.order_by(*[f"-{name}" if descending else name for name, descending in ordering])
+
+
+def get_keyset_ordering(queryset):
+    """
+    Return the ordering of queryset as [(field name, descending)] ending in pk, or
+    None if it can't be keyset paginated (unordered, expressions, related lookups).
+    """
+    query = queryset.query
+    order_by = query.order_by or (queryset.model._meta.ordering if query.default_ordering else ())
+    if not order_by:
+        return None
+    ordering = []
+    for field in order_by:
+        if not isinstance(field, str) or field == '?' or '__' in field:
+            return None
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if name in ('pk', queryset.model._meta.pk.name):
+            # unique - anything ordered after it is never compared
+            return ordering + [('pk', descending)]
+        ordering.append((name, descending))
+    return ordering + [('pk', ordering[-1][1])]
+
+
+def keyset_filter(ordering, key):
+    """
+    Q for the rows at or after key in ordering, e.g. for (-published, -pk):
+    published < key[0] OR (published = key[0] AND pk <= key[1])
+    """
+    name, descending = ordering[-1]
+    q = Q(**{f"{name}__{'lte' if descending else 'gte'}": key[-1]})
+    for (name, descending), value in zip(reversed(ordering[:-1]), reversed(key[:-1])):
+        q = Q(**{f"{name}__{'lt' if descending else 'gt'}": value}) | (Q(**{name: value}) & q)
+    return q
+
+
+class PageStart(Lookup):
+    """
+    True for the row number that starts a page of rhs rows. A lookup rather than a
+    Mod annotation, which Django would add to the GROUP BY of an aggregated queryset.
+    """
+    lookup_name = "page_start"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"MOD({lhs} - 1, {rhs}) = 0", (*lhs_params, *rhs_params)
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator that fetches each page with a keyset condition on the queryset ordering
+    (see keyset_filter) instead of OFFSET, so deep pages cost the same as page 1.
+
+    The first key of every page and the total are selected in one windowed query
+    that returns a row per page only, and cached for KEYSET_PAGINATION_CACHE_TIMEOUT
+    seconds - count and the page range can lag a publish by up to that long.
+    Next/previous links carry the first key of the target page as a cursor
+    (page.next_cursor / previous_cursor), so following them gives stable pages even if
+    posts are published in between.
+    """
+
+    def __init__(self, object_list, per_page, ordering, cursor=None, **kwargs):
+        super().__init__(order_by_keyset(object_list, ordering), per_page, **kwargs)
+        self.ordering = ordering
+        self.cursor = cursor
+
+    @cached_property
+    def page_index(self):
+        """{'count': total, 'keys': [first key of each page]}"""
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return {'count': 0, 'keys': []}
+        cache = caches["default"]
+        cache_key = KEYSET_PAGES_KEY.format(
+            hashlib.md5(f"{self.per_page}|{sql}|{params}".encode("utf-8")).hexdigest()
+        )
+        page_index = cache.get(cache_key)
+        if page_index is None:
+            names = [name for name, _ in self.ordering]
+            # (row number, total, *key) of the first row of each page, ordered by row number
+            rows = sorted(
+                self.object_list.order_by()
+                .annotate(
+                    keyset_row=Window(
+                        RowNumber(),
+                        order_by=[
+                            F(name).desc() if descending else F(name).asc()
+                            for name, descending in self.ordering
+                        ],
+                    ),
+                    keyset_total=Window(Count('pk')),
+                )
+                .filter(PageStart(F('keyset_row'), self.per_page))
+                .values_list('keyset_row', 'keyset_total', *names)
+            )
+            page_index = {
+                'count': rows[0][1] if rows else 0,
+                'keys': [tuple(row[2:]) for row in rows],
+            }
+            cache.set(cache_key, page_index, getattr(settings, "KEYSET_PAGINATION_CACHE_TIMEOUT", 300))
+        return page_index
+
+    @cached_property
+    def count(self):
+        return self.page_index['count']
+
+    def get_cursor_key(self, number):
+        """The key carried by the cursor if it is for page number, otherwise None"""
+        values = decode_cursor(self.cursor) if self.cursor else None
+        if not values or values[0] != number:
+            return None
+        return key_from_values(self.object_list.model, self.ordering, values[1:])
+
+    def get_key(self, obj):
+        return tuple(getattr(obj, name) for name, _ in self.ordering)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        keys = self.page_index['keys']
+        key = self.get_cursor_key(number)
+        if key is None and number <= len(keys):
+            key = keys[number - 1]
+        if key is None or None in key:
+            # nulls don't compare - fall back to OFFSET for this page
+            bottom = (number - 1) * self.per_page
+            rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        else:
+            rows = list(self.object_list.filter(keyset_filter(self.ordering, key))[:self.per_page + 1])
+
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.next_cursor = (
+            encode_cursor([number + 1, *self.get_key(rows[self.per_page])])
+            if len(rows) > self.per_page else None
+        )
+        page.previous_cursor = (
+            encode_cursor([number - 1, *keys[number - 2]])
+            if 1 < number <= len(keys) + 1 else None
+        )
+        return page
+
+
+def get_paginator(object_list, per_page, cursor=None, **kwargs):
+    """
+    Return a KeysetPaginator for object_list when KEYSET_PAGINATION is on and it is a
+    queryset with a keyset-able ordering, otherwise Django's Paginator.
+    cursor is the value of the 'cursor' GET parameter, if any.
+    """
+    if getattr(settings, "KEYSET_PAGINATION", False) and isinstance(object_list, QuerySet):
+        ordering = get_keyset_ordering(object_list)
+        if ordering:
+            return KeysetPaginator(object_list, per_page, ordering, cursor=cursor, **kwargs)
+    return Paginator(object_list, per_page, **kwargs)
+
+
+def get_cursor_page(queryset, limit, cursor=None, fields=('pk',)):
+    """
+    One page of an API listing paged with ?limit=&cursor= - returns (rows, next_cursor)
+    where rows are values_list(*fields) tuples for at most limit objects from cursor on.
+    The queryset ordering (with a pk tie-break, pk if unordered) is used as the keyset,
+    so every page costs the same however far in it is.
+    """
+    ordering = get_keyset_ordering(queryset) or [('pk', False)]
+    queryset = order_by_keyset(queryset, ordering)
+    values = decode_cursor(cursor) if cursor else None
+    key = key_from_values(queryset.model, ordering, values) if values else None
+    if key and None not in key:
+        queryset = queryset.filter(keyset_filter(ordering, key))
+    names = [name for name, _ in ordering]
+    rows = list(queryset.values_list(*names, *fields)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit][:len(names)]) if len(rows) > limit else None
+    return [row[len(names):] for row in rows[:limit]], next_cursor
@@ -0,0 +1,130 @@
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django_tasks import task
+from wagtail.models import get_page_models
+
+from .models import RelatedPage
+from .page_cache import purge_page_responses
+
+
+def get_related_page_models():
+    """Page models with a related pages index - those defining related_pages_order"""
+    return [model for model in get_page_models() if hasattr(model, "related_pages_order")]
+
+
+def get_related_pages_count():
+    return getattr(settings, "RELATED_PAGES_COUNT", 5)
+
+
+def get_incidence_matrix(model):
+    """
+    Return (page ids, matrix) for the live pages of model: page ids newest first
+    (model.related_pages_order) and a page x tag 0/1 matrix of their tags.
+    """
+    page_ids = list(
+        model.objects.live().order_by(*model.related_pages_order, "-pk").values_list("pk", flat=True)
+    )
+    index = {pk: i for i, pk in enumerate(page_ids)}
+    tags_field = model._meta.get_field("tags")
+    pairs = tags_field.remote_field.through.objects.filter(
+        **{f"{tags_field.m2m_field_name()}__in": page_ids}
+    ).values_list(tags_field.m2m_field_name(), tags_field.m2m_reverse_field_name())
+    rows, tags = [], []
+    for page_id, tag_id in pairs:
+        rows.append(index[page_id])
+        tags.append(tag_id)
+    tag_ids, columns = np.unique(np.array(tags, dtype=np.int64), return_inverse=True)
+    # float32 so the overlap product runs through BLAS - small integer counts stay exact
+    matrix = np.zeros((len(page_ids), len(tag_ids)), dtype=np.float32)
+    matrix[np.array(rows, dtype=np.int64), columns] = 1
+    return page_ids, matrix
+
+
+def _top_related(matrix, targets, limit):
+    """(indexes, scores) of the top limit rows of matrix for each target row"""
+    count = matrix.shape[0]
+    scores = matrix[targets] @ matrix.T
+    scores[np.arange(len(targets)), targets] = 0
+    # one sort key: shared tags first, then newest (lowest index) - unique per row so no ties
+    keys = scores.astype(np.int64) * count + (count - 1 - np.arange(count))
+    keys[scores == 0] = -1
+    top = np.argpartition(-keys, limit - 1, axis=1)[:, :limit]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+    top_keys = np.take_along_axis(keys, top, axis=1)
+    return top, np.where(top_keys >= 0, top_keys // count, 0)
+
+
+def compute_related_pages(model, page_ids=None, limit=None, chunk_size=500):
+    """
+    Return {page id: [(related page id, shared tag count)]} for page_ids (default all
+    live pages of model), up to limit related pages each ranked by shared tags then
+    recency. Overlaps are a product of the page x tag incidence matrix with itself,
+    chunk_size target pages at a time.
+    """
+    all_ids, matrix = get_incidence_matrix(model)
+    if not all_ids:
+        return {}
+    limit = min(limit or get_related_pages_count(), len(all_ids))
+    index = {pk: i for i, pk in enumerate(all_ids)}
+    targets = np.array(
+        [index[pk] for pk in (all_ids if page_ids is None else page_ids) if pk in index], dtype=np.int64
+    )
+    related = {}
+    for start in range(0, len(targets), chunk_size):
+        chunk = targets[start:start + chunk_size]
+        top, scores = _top_related(matrix, chunk, limit)
+        for target, row, row_scores in zip(chunk, top, scores):
+            related[all_ids[target]] = [
+                (all_ids[i], int(score)) for i, score in zip(row, row_scores) if score > 0
+            ]
+    return related
+
+
+def update_related_pages(model, page_ids=None):
+    """
+    Recompute the RelatedPage rows of page_ids (default all pages of model). Pages no
+    longer live lose their rows. The cached responses of the updated pages are
+    evicted, as they render their related pages.
+    """
+    related = compute_related_pages(model, page_ids)
+    entries = [
+        RelatedPage(page_id=page_id, related_page_id=related_id, score=score, rank=rank)
+        for page_id, pages in related.items()
+        for rank, (related_id, score) in enumerate(pages)
+    ]
+    with transaction.atomic():
+        if page_ids is None:
+            rows = RelatedPage.objects.filter(page__in=model.objects.values("pk"))
+            page_ids = set(rows.values_list("page_id", flat=True)) | set(related)
+            rows.delete()
+        else:
+            RelatedPage.objects.filter(page_id__in=page_ids).delete()
+        RelatedPage.objects.bulk_create(entries)
+    purge_page_responses(*page_ids)
+
+
+def get_affected_page_ids(page):
+    """
+    Pages whose related list can change when page is (re)published or unpublished:
+    the page, pages listing it now and pages sharing any of its current tags.
+    """
+    model = page.specific_class
+    tags_field = model._meta.get_field("tags")
+    through = tags_field.remote_field.through
+    tag_ids = through.objects.filter(**{tags_field.m2m_field_name(): page.pk}).values(
+        tags_field.m2m_reverse_field_name()
+    )
+    page_ids = {page.pk}
+    page_ids.update(RelatedPage.objects.filter(related_page=page.pk).values_list("page_id", flat=True))
+    page_ids.update(
+        through.objects.filter(**{f"{tags_field.m2m_reverse_field_name()}__in": tag_ids})
+        .values_list(tags_field.m2m_field_name(), flat=True)
+    )
+    return sorted(page_ids)
+
+
+@task(backend="background", queue_name="related-pages")
+def update_related_pages_task(app_label, model_name, page_ids=None):
+    update_related_pages(apps.get_model(app_label, model_name), page_ids)
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models import Q
+from django_tasks import task
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter, SourceImageIOError
+
+# Renditions the templates and structured data render, by the image field feeding them.
+# Keep in step with the {% image %} tags - a spec missing here is resized in the request.
+GOOGLE_THUMBNAIL_SPECS = [
+    "thumbnail-1200x800|format-png",
+    "thumbnail-800x600|format-png",
+    "thumbnail-400x300|format-png",
+    "thumbnail-500x500|format-png",
+]
+BRAND_LOGO_SPECS = ["thumbnail-500x500|format-png"]
+BLOG_CARD_SPECS = ["thumbnail-500x250|format-webp", "thumbnail-500x250"]  # core/blog_card.html, recipe api
+CARD_SPECS = ["fill-525x350"]  # recipe and travel cards
+PAGE_IMAGE_SPECS = {
+    "search_image": GOOGLE_THUMBNAIL_SPECS + BLOG_CARD_SPECS + CARD_SPECS + [
+        "fill-250x250",  # related recipe cards
+        "fill-350x350-c100", "fill-350x350-c100|format-webp",  # recipe page
+    ],
+    "banner_image": [
+        # core/banner_image.html
+        "fill-2100x700-c100", "fill-2100x700-c100|format-webp", "fill-1500x500-c100|format-webp",
+        "fill-900x300-c100|format-webp", "fill-600x200-c100|format-webp",
+    ],
+    "intro_image": [
+        # contact/contact_page.html
+        "width-700", "width-700|format-webp", "width-550|format-webp", "width-300|format-webp",
+    ],
+}
+
+
+# blog/detail/banner.html - a blog listing's banner as rendered on its posts, see
+# BlogListingPage.extra_rendition_specs
+POST_BANNER_SPECS = [
+    "fill-2100x525-c100", "fill-2100x525-c100|format-webp", "fill-1500x375-c100|format-webp",
+    "fill-900x225-c100|format-webp", "fill-600x150-c100|format-webp",
+]
+
+
+def get_upload_specs():
+    """Specs generated for every new or changed image - the SEO and card sizes"""
+    return PAGE_IMAGE_SPECS["search_image"] + [settings.WAGTAILMETADATA_IMAGE_FILTER]
+
+
+def get_page_rendition_specs(page):
+    """
+    {image id: [specs]} for the images rendered by a (specific) page's templates and,
+    through extra_rendition_specs ({field name: [specs]}), by other pages' templates
+    """
+    image_specs = defaultdict(list)
+    for field_specs in (PAGE_IMAGE_SPECS, getattr(page, "extra_rendition_specs", {})):
+        for field_name, specs in field_specs.items():
+            image_id = getattr(page, f"{field_name}_id", None)
+            if image_id:
+                image_specs[image_id].extend(specs)
+    if getattr(page, "search_image_id", None):
+        image_specs[page.search_image_id].append(settings.WAGTAILMETADATA_IMAGE_FILTER)
+    return image_specs
+
+
+def warm_renditions(image_specs):
+    """Queue generation of {image id: [specs]} - existing renditions are skipped by the worker"""
+    for image_id, specs in image_specs.items():
+        generate_renditions_task.enqueue(image_id, sorted(set(specs)))
+
+
+def prefetch_renditions(pages, specs, field_name="search_image"):
+    """
+    Load the specs renditions of the field_name image of each page in a list of pages
+    (e.g. one page of a listing) and attach the images, with their renditions
+    prefetched, to the pages. Renditions not generated yet are created together and
+    saved in one statement. Returns the pages as a list.
+
+    Use {% card_rendition %} to read them - {% image %} writes each rendition back
+    to the rendition cache.
+    """
+    pages = list(pages)
+    image_ids = {getattr(page, f"{field_name}_id", None) for page in pages} - {None}
+    if not image_ids:
+        return pages
+
+    Image = get_image_model()
+    Rendition = Image.get_rendition_model()
+    images = Image.objects.in_bulk(image_ids)
+    for image in images.values():
+        image.prefetched_renditions = []
+    for rendition in Rendition.objects.filter(image_id__in=images, filter_spec__in=specs):
+        images[rendition.image_id].prefetched_renditions.append(rendition)
+
+    filters = [Filter(spec=spec) for spec in specs]
+    to_create = []
+    for image in images.values():
+        if image.is_svg():
+            continue
+        missing = [f for f in filters if f not in image.find_existing_renditions(*filters)]
+        if not missing:
+            continue
+        try:
+            with image.open_file() as image_file:
+                source = image_file.read()
+        except SourceImageIOError:
+            # rendered as not found by the template tag
+            continue
+        to_create.extend(image.generate_rendition_instance(f, BytesIO(source)) for f in missing)
+
+    if to_create:
+        # made by another request in the meantime - use theirs
+        lookup_q = Q()
+        for rendition in to_create:
+            lookup_q |= Q(
+                image_id=rendition.image_id,
+                filter_spec=rendition.filter_spec,
+                focal_point_key=rendition.focal_point_key,
+            )
+        existing = {
+            (rendition.image_id, rendition.filter_spec, rendition.focal_point_key): rendition
+            for rendition in Rendition.objects.filter(lookup_q)
+        }
+        new = []
+        for rendition in to_create:
+            found = existing.get((rendition.image_id, rendition.filter_spec, rendition.focal_point_key))
+            if found:
+                images[rendition.image_id].prefetched_renditions.append(found)
+            else:
+                new.append(rendition)
+        Rendition.objects.bulk_create(new, ignore_conflicts=True)
+        for rendition in new:
+            images[rendition.image_id].prefetched_renditions.append(rendition)
+
+    for page in pages:
+        image = images.get(getattr(page, f"{field_name}_id", None))
+        if image is not None:
+            setattr(page, field_name, image)
+    return pages
+
+
+@task(backend="renditions", queue_name="renditions", enqueue_on_commit=True)
+def generate_renditions_task(image_id, specs):
+    image = get_image_model().objects.filter(pk=image_id).first()
+    # svg is served as is (see get_organisation_logo, menu icons)
+    if image is None or image.is_svg():
+        return
+    # one query for the existing renditions, only the missing ones are generated
+    image.get_renditions(*specs)
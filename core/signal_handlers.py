@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction
+from wagtail.signals import page_slug_changed
+
+from site_settings.models import (Brand, CompanyLogo, SiteTokens,
+                                  SocialMediaLinks, TemplateText)
+
+from .renditions import BRAND_LOGO_SPECS, get_upload_specs, warm_renditions
+from .sitemap import update_sitemap_subtree
+from .utils import (get_inline_svg, purge_menu_cache_fragments,
+                    purge_section_head_cache_fragments)
+
+
+def warm_image_renditions(instance, raw=False, **kwargs):
+    # also runs when the file or focal point changes - both need new renditions
+    if raw:
+        return
+    if instance.is_svg():
+        # menu and social media icons are inlined - sanitise the new file now
+        try:
+            get_inline_svg(instance)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            # unreadable or not xml - left to fail where it is rendered, as before
+            pass
+    else:
+        warm_renditions({instance.pk: get_upload_specs()})
+
+
+def warm_brand_logo_renditions(instance, raw=False, **kwargs):
+    if not raw and instance.logo_id:
+        warm_renditions({instance.logo_id: BRAND_LOGO_SPECS})
+
+
+def update_sitemap_after_slug_change(instance, **kwargs):
+    # descendant urls were rewritten with the page's url_path
+    update_sitemap_subtree(instance)
+
+
+def purge_heads_after_slug_change(instance, **kwargs):
+    # cached <head> fragments list the old urls as hreflang alternates
+    purge_section_head_cache_fragments(instance)
+
+
+def update_sitemap_after_restriction_change(instance, raw=False, **kwargs):
+    # restrictions apply to the whole section below the page - updated once the
+    # change is committed, when a deleted page (and its restrictions) is gone
+    if raw:
+        return
+    page_id = instance.page_id
+
+    def update():
+        page = Page.objects.filter(pk=page_id).first()
+        if page is not None:
+            update_sitemap_subtree(page)
+
+    transaction.on_commit(update)
+
+
+def purge_site_wide_caches(raw=False, **kwargs):
+    # rendered in the navbar, footer and head of every page
+    if not raw:
+        purge_menu_cache_fragments()
+
+
+def register_signal_handlers():
+    post_save.connect(warm_image_renditions, sender=get_image_model())
+    post_save.connect(warm_brand_logo_renditions, sender=Brand)
+    page_slug_changed.connect(update_sitemap_after_slug_change)
+    page_slug_changed.connect(purge_heads_after_slug_change)
+    post_save.connect(update_sitemap_after_restriction_change, sender=PageViewRestriction)
+    post_delete.connect(update_sitemap_after_restriction_change, sender=PageViewRestriction)
+    for model in (Brand, CompanyLogo, SiteTokens, SocialMediaLinks, TemplateText):
+        post_save.connect(purge_site_wide_caches, sender=model)
+        post_delete.connect(purge_site_wide_caches, sender=model)
@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from wagtail.models import Page
+
+from .models import SitemapEntry, get_alternates_for_pages
+
+SITEMAP_CACHE_KEY = "sitemap:{}"
+
+
+def get_shard_size():
+    return getattr(settings, "SITEMAP_SHARD_SIZE", 5000)
+
+
+def _url_list(urls):
+    # get_sitemap_urls() may return a dict, a list of dicts or [] for excluded pages
+    if not urls:
+        return []
+    return urls if isinstance(urls, list) else [urls]
+
+
+def build_sitemap_entries(pages):
+    """Return unsaved SitemapEntry objects for an iterable of specific pages"""
+    pages = list(pages)
+    # shared memo for site root paths and alternates across the whole batch
+    request = SimpleNamespace()
+    get_alternates_for_pages(
+        [page for page in pages if getattr(page, "search_engine_index", True)], request
+    )
+    entries = []
+    for page in pages:
+        if getattr(page, "search_engine_index", True) is False:
+            continue
+        url_parts = page.get_url_parts(request)
+        if url_parts is None:
+            continue
+        for url in _url_list(page.get_sitemap_urls(request)):
+            entries.append(SitemapEntry(
+                site_id=url_parts[0],
+                page_id=page.pk,
+                path=page.path,
+                location=url["location"],
+                lastmod=url.get("lastmod"),
+                changefreq=url.get("changefreq") or "",
+                priority=url.get("priority"),
+                alternates=url.get("alternates"),
+            ))
+    return entries
+
+
+def update_sitemap_pages(page_ids):
+    """
+    Recompute the sitemap entries for the given page ids. Pages no longer live or
+    public simply lose their entries. Cached shards for affected sites are dropped.
+    """
+    page_ids = list(page_ids)
+    if not page_ids:
+        return
+    site_ids = set(
+        SitemapEntry.objects.filter(page_id__in=page_ids).values_list("site_id", flat=True)
+    )
+    pages = Page.objects.live().public().filter(pk__in=page_ids).defer_streamfields().specific()
+    entries = build_sitemap_entries(pages)
+    with transaction.atomic():
+        SitemapEntry.objects.filter(page_id__in=page_ids).delete()
+        SitemapEntry.objects.bulk_create(entries)
+    site_ids.update(entry.site_id for entry in entries)
+    invalidate_sitemap(*site_ids)
+
+
+def update_sitemap_subtree(page):
+    """
+    Recompute the entries for page, its descendants and their translations - the
+    locations, alternates or visibility of all of them change with page's url or
+    view restrictions.
+    """
+    translation_keys = Page.objects.descendant_of(page, inclusive=True).values("translation_key")
+    update_sitemap_pages(
+        Page.objects.filter(translation_key__in=translation_keys).values_list("pk", flat=True)
+    )
+
+
+def rebuild_sitemap(site):
+    """Rebuild every entry for a site from the page tree"""
+    pages = Page.objects.none()
+    for locale_home in site.root_page.get_translations(inclusive=True):
+        pages |= Page.objects.descendant_of(locale_home, inclusive=True)
+    entries = build_sitemap_entries(
+        pages.live().public().defer_streamfields().specific()
+    )
+    with transaction.atomic():
+        SitemapEntry.objects.filter(site=site).delete()
+        SitemapEntry.objects.bulk_create(
+            [entry for entry in entries if entry.site_id == site.pk]
+        )
+    invalidate_sitemap(site.pk)
+
+
+def invalidate_sitemap(*site_ids):
+    caches["default"].delete_many([SITEMAP_CACHE_KEY.format(site_id) for site_id in site_ids])
+
+
+def _gzip_document(xml, lastmod):
+    data = gzip.compress(xml.encode("utf-8"), mtime=0)
+    return {
+        "gzip": data,
+        "etag": f'"{hashlib.md5(data).hexdigest()}"',
+        "lastmod": int(lastmod.timestamp()) if lastmod else None,
+    }
+
+
+def get_sitemap(site):
+    """
+    Return the gzipped sitemap documents for a site: {'index': doc or None, 'shards': [doc]}
+    Each doc is {'gzip': bytes, 'etag': str, 'lastmod': timestamp}. A single shard is served
+    as /sitemap.xml; over SITEMAP_SHARD_SIZE urls, /sitemap.xml becomes a sitemap index.
+    """
+    cache = caches["default"]
+    cache_key = SITEMAP_CACHE_KEY.format(site.pk)
+    sitemap = cache.get(cache_key)
+    if sitemap is not None:
+        return sitemap
+
+    entries = SitemapEntry.objects.filter(site=site)
+    if not entries.exists():
+        rebuild_sitemap(site)
+    entries = list(entries.order_by("path", "pk").values(
+        "location", "lastmod", "changefreq", "priority", "alternates"
+    ))
+
+    shard_size = get_shard_size()
+    shards = []
+    sitemaps = []
+    for number, start in enumerate(range(0, max(len(entries), 1), shard_size), start=1):
+        urlset = entries[start:start + shard_size]
+        lastmod = max((url["lastmod"] for url in urlset if url["lastmod"]), default=None)
+        xml = render_to_string("sitemap.xml", {"urlset": urlset})
+        shards.append(_gzip_document(xml, lastmod))
+        sitemaps.append({"location": f"{site.root_url}/sitemap-{number}.xml", "lastmod": lastmod})
+
+    index = None
+    if len(shards) > 1:
+        xml = render_to_string("sitemap_index.xml", {"sitemaps": sitemaps})
+        lastmod = max((x["lastmod"] for x in sitemaps if x["lastmod"]), default=None)
+        index = _gzip_document(xml, lastmod)
+
+    sitemap = {"index": index, "shards": shards}
+    cache.set(cache_key, sitemap, None)
+    return sitemap
@@ -1,5 +1,48 @@
 // js/embed-external-link-blocks.js
 
+// Image url checks requested in the same tick (e.g. every block on page load) are sent
+// as one /check-image-url/?url=..&url=.. request and checked concurrently server side
+const imageUrlCheckQueue = new Map();
+
+const checkImageUrl = (imageUrl) => {
+    if (!imageUrlCheckQueue.has(imageUrl)) {
+        let resolveCheck, rejectCheck;
+        const promise = new Promise((resolve, reject) => {
+            resolveCheck = resolve;
+            rejectCheck = reject;
+        });
+        imageUrlCheckQueue.set(imageUrl, { promise, resolve: resolveCheck, reject: rejectCheck });
+        if (imageUrlCheckQueue.size === 1) {
+            setTimeout(flushImageUrlChecks, 0);
+        }
+    }
+    return imageUrlCheckQueue.get(imageUrl).promise;
+}
+
+const IMAGE_URL_CHECK_MAX_BATCH = 50; // matches settings.IMAGE_URL_CHECK_MAX_BATCH
+
+const flushImageUrlChecks = () => {
+    const checks = [...imageUrlCheckQueue.entries()];
+    imageUrlCheckQueue.clear();
+    for (let i = 0; i < checks.length; i += IMAGE_URL_CHECK_MAX_BATCH) {
+        sendImageUrlChecks(new Map(checks.slice(i, i + IMAGE_URL_CHECK_MAX_BATCH)));
+    }
+}
+
+const sendImageUrlChecks = async (batch) => {
+    const urls = [...batch.keys()];
+    const query = urls.map((url) => `url=${encodeURIComponent(url)}`).join('&');
+    try {
+        const response = await fetch(`/check-image-url/?${query}`);
+        const data = await response.json();
+        // a single url returns {valid}, a batch returns {results: {url: valid}}
+        const results = data.results || { [urls[0]]: data.valid };
+        batch.forEach((check, url) => check.resolve(!!results[url]));
+    } catch (error) {
+        batch.forEach((check) => check.reject(error));
+    }
+}
+
 class ExternalLinkEmbedBlockDefinition extends window.wagtailStreamField.blocks
     .StructBlockDefinition {
     render(placeholder, prefix, initialState, initialError) {
@@ -14,9 +57,8 @@ class ExternalLinkEmbedBlockDefinition extends window.wagtailStreamField.blocks
             const imageUrl = block.imageInput.value;
             if (imageUrl) {
                 try {
-                    const response = await fetch(`/check-image-url/?url=${encodeURIComponent(imageUrl)}`);
-                    const data = await response.json();
-                    if (data.valid) {
+                    const valid = await checkImageUrl(imageUrl);
+                    if (valid) {
                         block.imagePreview.innerHTML = `<img src="${imageUrl}" alt="Image Preview" class="external-link-embed-block-image-preview">`;
                     } else {
                         block.imagePreview.innerHTML = '<p class="error-message">Failed to load image<p>';
@@ -0,0 +1,113 @@
+import csv
+import io
+
+from django.core.cache import caches
+from lxml import html as lxml_html
+from wagtail import blocks
+
+from .utils import clean_extracted_text
+
+TEXT_CACHE_KEY = "streamfield-text:{}:{}"
+TEXT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _html_text(markup, strip_tags):
+    """Text nodes of an html fragment joined by spaces, dropping any strip_tags elements"""
+    if not markup or not markup.strip():
+        return []
+    root = lxml_html.fragment_fromstring(markup, create_parent="div")
+    if strip_tags:
+        for element in list(root.iter(*strip_tags)):
+            element.drop_tree()
+    return list(root.itertext())
+
+
+def _csv_text(data):
+    return [cell for row in csv.reader(io.StringIO(data)) for cell in row]
+
+
+def _walk(block, value, strip_tags, out):
+    """
+    Append the visible text in raw (JSON) block data to out, using the block
+    definitions to interpret it. Nothing is converted to python or rendered so
+    there are no database lookups for chooser blocks.
+    """
+    if value in (None, "", [], {}):
+        return
+
+    if isinstance(block, blocks.StreamBlock):
+        for child in value:
+            child_block = block.child_blocks.get(child.get("type"))
+            if child_block is not None:
+                _walk(child_block, child.get("value"), strip_tags, out)
+
+    elif isinstance(block, blocks.ListBlock):
+        for item in value:
+            # list items are stored as {'type': 'item', 'value': ..., 'id': ...} since Wagtail 2.16
+            if isinstance(item, dict) and item.get("type") == "item" and "value" in item:
+                item = item["value"]
+            _walk(block.child_block, item, strip_tags, out)
+
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            # raw code (BlogCodeBlock, DjangoTemplateFragmentBlock) is rendered inside <code>
+            if name == "code" and "code" in strip_tags:
+                continue
+            _walk(child_block, value.get(name), strip_tags, out)
+
+    elif not getattr(block, "search_index", True):
+        return
+
+    elif isinstance(block, blocks.RichTextBlock):
+        out.extend(_html_text(value, strip_tags))
+
+    elif isinstance(block, blocks.RawHTMLBlock):
+        out.extend(_html_text(value, strip_tags))
+
+    elif isinstance(block, blocks.TextBlock) and getattr(block, "file_type_filter", None) == ".csv":
+        out.extend(_csv_text(value))
+
+    elif isinstance(block, (blocks.CharBlock, blocks.TextBlock)):
+        out.append(value)
+
+
+def extract_streamfield_text(
+    streamfield,
+    strip_newlines=True,
+    strip_punctuation=True,
+    lowercase=False,
+    strip_tags=["style", "script"],
+    revision_id=None,
+):
+    """
+    Render-free alternative to core.utils.get_streamfield_text()
+
+    Walks the raw block data of a StreamField and collects rich text, char/text
+    blocks (headings, captions, titles etc.), raw html and csv table data. Field
+    blocks declared with search_index=False (anchors, icons, urls) are skipped, as
+    are choice, chooser and numeric blocks. The text is cleaned in the same way as
+    get_streamfield_text() so word counts are comparable.
+
+    If revision_id is given, the result is cached against it - the streamfield
+    must then hold the content of that revision.
+    """
+    cache_key = None
+    if revision_id:
+        options = f"{int(strip_newlines)}{int(strip_punctuation)}{int(lowercase)}{'-'.join(strip_tags or [])}"
+        cache_key = TEXT_CACHE_KEY.format(revision_id, options)
+        text = caches["default"].get(cache_key)
+        if text is not None:
+            return text
+
+    out = []
+    _walk(streamfield.stream_block, streamfield.raw_data, strip_tags or [], out)
+    text = clean_extracted_text(
+        " ".join(out),
+        strip_newlines=strip_newlines,
+        strip_punctuation=strip_punctuation,
+        lowercase=lowercase,
+    )
+
+    if cache_key:
+        caches["default"].set(cache_key, text, TEXT_CACHE_TIMEOUT)
+    return text
@@ -4,11 +4,12 @@ from urllib.parse import urlparse
 
 from django import template
 from django.conf import settings
-from django.utils.html import json_script
+from django.utils.html import format_html_join, json_script
 from django.utils.safestring import mark_safe
 from django.utils.text import normalize_newlines
 from wagtail.admin.templatetags.wagtailadmin_tags import render_with_errors
 from wagtail.documents.models import Document
+from wagtail.images.shortcuts import get_renditions_or_not_found
 from wagtail.models import Page
 
 from site_settings.models import (Brand, EmailSignature, SiteTokens,
@@ -103,6 +104,18 @@ def canonical(context):
         href += f'?page={pagination.number}'
     return mark_safe(f'<link rel="canonical" href="{href}">')
 
+@register.simple_tag(takes_context=True)
+def alternate_links(context):
+    """hreflang links for the current page, memoised per request"""
+    page = get_context_var_or_none(context, 'self')
+    if not (page and hasattr(page, 'get_alternates')):
+        return ''
+    alternates = page.get_alternates(context.get('request', None)) or []
+    return format_html_join(
+        '', '<link rel="alternate" hreflang="{}" href="{}">',
+        ((alt['lang_code'], alt['location']) for alt in alternates)
+    )
+
 @register.simple_tag(takes_context=True)
 def get_cache_key_settings(context):
     page = get_context_var_or_none(context, 'self')
@@ -217,3 +230,14 @@ def get_referrer_or_none(context):
 @register.filter()
 def checkbox_checked(checkbox):
     return mark_safe(str(checkbox)[:-1] + " checked>")
+
+@register.simple_tag()
+def card_rendition(image, spec):
+    """
+    The spec rendition of image, e.g. {% card_rendition post.search_image "fill-525x350" as img %}.
+    Renditions attached by core.renditions.prefetch_renditions are used as they are,
+    with no cache or database query.
+    """
+    if not image:
+        return None
+    return get_renditions_or_not_found(image, [spec])[spec]
@@ -0,0 +1,34 @@
+from adv_cache_tag.tag import CacheTag
+from django import template
+
+from core.models import FragmentCacheKey
+from core.utils import register_cache_fragment
+
+register = template.Library()
+
+class FragmentCacheTag(CacheTag):
+    """
+    adv_cache_tag {% cache %} that records each key it writes in the fragment registry.
+    Usage is unchanged: {% cache None cache_name "fragment" [vary_on...] cache_date %}
+    The fragment name (page slug) and first vary_on argument (fragment) are stored with
+    the key so purges can delete by primary key instead of scanning the cache table.
+    """
+
+    def get_fragment_group(self):
+        # navbar.html is always included with the menu in context
+        if self.context.get('menu') is not None:
+            return FragmentCacheKey.MENU
+        if self.get_pk() == FragmentCacheKey.FOOTER:
+            return FragmentCacheKey.FOOTER
+        return ''
+
+    def cache_set(self, to_cache):
+        super().cache_set(to_cache)
+        register_cache_fragment(
+            self.cache_key,
+            slug=self.fragment_name,
+            fragment=self.get_pk(),
+            group=self.get_fragment_group(),
+        )
+
+FragmentCacheTag.register(register)
@@ -4,6 +4,7 @@ from django import template
 from django.utils.safestring import mark_safe
 from wagtail.rich_text import RichText
 
+from core.renditions import BRAND_LOGO_SPECS, GOOGLE_THUMBNAIL_SPECS
 from site_settings.models import Brand, SocialMediaLinks
 
 register = template.Library()
@@ -32,12 +33,9 @@ def get_google_thumbnails(context, img):
     if not img:
         return []
     request = context['request']
-    sizes = ["thumbnail-1200x800|format-png", "thumbnail-800x600|format-png", "thumbnail-400x300|format-png", "thumbnail-500x500|format-png"]
-    urls = []
-    for spec in sizes:
-        rendition = img.get_rendition(spec)
-        urls.append(request.build_absolute_uri(rendition.url))
-    return urls
+    # one query for all four - they are generated ahead by the rendition workers
+    renditions = img.get_renditions(*GOOGLE_THUMBNAIL_SPECS)
+    return [request.build_absolute_uri(renditions[spec].url) for spec in GOOGLE_THUMBNAIL_SPECS]
 
     
 @register.simple_tag(takes_context=True)
@@ -58,7 +56,7 @@ def get_organisation_logo(context):
         if logo and logo.is_svg():
             return logo.full_url
         elif logo:
-            return logo.get_rendition('thumbnail-500x500|format-png').full_url
+            return logo.get_rendition(BRAND_LOGO_SPECS[0]).full_url
     except (AttributeError, Brand.DoesNotExist):
         pass
     return ''
\ No newline at end of file
@@ -3,33 +3,51 @@ from wagtail.images.image_operations import FilterOperation
 from willow.plugins.pillow import PillowImage
 from willow.registry import registry
 
+# Downscales by this factor or more are first shrunk with reduce() (whole pixel blocks)
+# before the LANCZOS pass - 3.0 is indistinguishable from a full resample.
+REDUCING_GAP = 3.0
+
+
+def fit_size(size, width, height):
+    """Size of an image of size scaled to fit inside width x height"""
+    img_width, img_height = size
+    if width/height < img_width/img_height:
+        # thumb aspect ratio is more narrow than original - scale as proportion of width
+        return width, max(1, round(img_height * width/img_width))
+    # thumb aspect ratio is wider than original - scale as proportion of height
+    return max(1, round(img_width * height/img_height)), height
+
+
 def thumbnail(image, width, height):
-    img = Image.frombytes('RGB', image.get_size(), image.to_buffer_rgb().data, 'raw')
-    original_aspect = img.width/img.height
-    thumbnail_aspect = width/height
-    
-    if original_aspect == thumbnail_aspect:
-        # return resized image
-        return PillowImage(img.resize((width, height)))
+    """
+    Scale image to fit width x height. If the aspect ratios differ, it is centred on a
+    transparent canvas of that size. Works on the Pillow image directly:
+    - A JPEG that is not decoded yet is drafted at the smallest 1/2, 1/4 or 1/8 scale
+      still larger than the thumbnail.
+    - Large downscales are reduced before resampling.
+    - Any alpha channel is kept. Other modes are converted to RGB(A) first.
+    """
+    img = image.image
+    if img.width/img.height == width/height:
+        size = (width, height)
     else:
-        # create transparent background size of requested thumbnail
-        thumb = Image.new('RGB', (width, height), (255, 255, 255)) 
-        thumb.putalpha(0)
-
-        if thumbnail_aspect < original_aspect:
-        # thumb aspect ratio is more narrow than original
-            # scale as proportion of width
-            resized_original = img.resize((width, round(img.height * width/img.width)))
-            # paste into background with top/bottom spacing
-            thumb.paste(resized_original, (0,(height-resized_original.height)//2))
-        else:
-        # thumb aspect ratio is wider than original
-            # scale as proportion of height
-            resized_original = img.resize((round(img.width * height/img.height), height))
-            # paste into background with left/right spacing
-            thumb.paste(resized_original, ((width-resized_original.width)//2, 0))
-
-        return PillowImage(thumb)
+        size = fit_size(img.size, width, height)
+
+    # no-op once the image is loaded, or for other formats
+    img.draft(img.mode, size)
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        # palette images don't get antialiased when minified, 16 bit (I;16) can't be
+        # resampled at all, CMYK etc. can't be saved as png/webp
+        img = img.convert("RGBA" if image.has_alpha() else "RGB")
+    img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    if size == (width, height):
+        return PillowImage(img)
+
+    # transparent background size of requested thumbnail, image pasted with its own alpha
+    thumb = Image.new("RGBA", (width, height), (255, 255, 255, 0))
+    thumb.paste(img, ((width - img.width)//2, (height - img.height)//2))
+    return PillowImage(thumb)
 
 registry.register_operation(PillowImage, 'thumbnail', thumbnail)
 
@@ -40,4 +58,4 @@ class ThumbnailOperation(FilterOperation):
         self.height = int(height_str)
 
     def run(self, willow, image, env):
-        return willow.thumbnail(self.width, self.height)
\ No newline at end of file
+        return willow.thumbnail(self.width, self.height)
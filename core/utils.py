@@ -7,7 +7,9 @@ from html import unescape
 
 from bs4 import BeautifulSoup
 from django.core.cache import caches
-from django.db import connection
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import Lag, Lead
 from lxml import etree
 from wagtail.blocks import ListBlock, StreamValue
 
@@ -56,34 +58,137 @@ def strip_svg_markup(svg_markup):
         element.attrib.pop('height', None)
         element.attrib.pop('width', None)
     return etree.tostring(root, encoding='unicode', method='xml', xml_declaration=False)
+
+
+INLINE_SVG_KEY = "inline-svg:{}"
+INLINE_SVG_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+_inline_svg = {}  # in-process memo {file hash: markup}
+
+
+def get_inline_svg(image):
+    """
+    strip_svg_markup() of an svg image's file. Keyed on the file hash, so a new file
+    gets a new entry - the sanitised markup is memoised in process and held in the
+    default cache, and the file is only read once per file version across workers.
+    """
+    # images saved before wagtail stored hashes fall back to the file name
+    key = INLINE_SVG_KEY.format(image.file_hash or image.file.name)
+    svg = _inline_svg.get(key)
+    if svg is None:
+        cache = caches["default"]
+        svg = cache.get(key)
+        if svg is None:
+            with image.open_file() as svg_file:
+                svg = strip_svg_markup(svg_file.read().decode('utf-8'))
+            cache.set(key, svg, INLINE_SVG_CACHE_TIMEOUT)
+        if len(_inline_svg) >= 256:
+            _inline_svg.clear()
+        _inline_svg[key] = svg
+    return svg
     
 def clear_page_cache():
+    from core.models import FragmentCacheKey
+
     caches["default"].clear()
     caches["renditions"].clear()
+    FragmentCacheKey.objects.all().delete()
+
+
+def register_cache_fragment(cache_key, slug, fragment, group=''):
+    """Record a fragment cache key against its page slug, fragment name and group"""
+    from core.models import FragmentCacheKey
+
+    FragmentCacheKey.objects.bulk_create(
+        [FragmentCacheKey(
+            cache_key=cache_key[:255],
+            slug=str(slug)[:255],
+            fragment=str(fragment)[:255],
+            group=group,
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def purge_cache_fragments(**filters):
+    """
+    Delete registered fragments matching filters (e.g. slug='about', group__in=[...]).
+    Keys are removed from the cache with a single primary key delete (delete_many),
+    cost stays flat regardless of the cache table size.
+    """
+    from core.models import FragmentCacheKey
+
+    registry = FragmentCacheKey.objects.filter(**filters)
+    cache_keys = list(registry.values_list("cache_key", flat=True))
+    if cache_keys:
+        caches["default"].delete_many(cache_keys)
+        FragmentCacheKey.objects.filter(cache_key__in=cache_keys).delete()
 
 
 def purge_page_cache_fragments(slug):
-    sql = f"DELETE FROM public.cache_table WHERE cache_key LIKE '%template.cache.{slug}.%';"
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
+    purge_cache_fragments(slug=slug)
+
+
+def purge_head_cache_fragments(*slugs):
+    # 'head' and the per listing page 'head-pageN' fragments
+    purge_cache_fragments(slug__in=slugs, fragment__startswith="head")
+
+
+def purge_section_head_cache_fragments(page):
+    """
+    Head fragments of page, its descendants and all their translations - the hreflang
+    alternates in them change with page's url (move or slug change).
+    """
+    from wagtail.models import Page
+
+    translation_keys = page.get_descendants(inclusive=True).values("translation_key")
+    purge_head_cache_fragments(
+        *Page.objects.filter(translation_key__in=translation_keys).values_list("slug", flat=True)
+    )
 
 
 def purge_menu_cache_fragments():
-    sql = "DELETE FROM public.cache_table WHERE cache_key LIKE '%.menu.%';"
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-    sql = "DELETE FROM public.cache_table WHERE cache_key LIKE '%.footer.%';"
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
+    from core.page_cache import purge_site_page_responses
+
+    purge_cache_fragments(group__in=["menu", "footer"])
+    # full page responses embed the navbar and footer
+    purge_site_page_responses()
 
 
 def purge_blog_list_cache_fragments():
-    sql = "DELETE FROM public.cache_table WHERE cache_key LIKE '%next_prev%';"
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-    sql = "DELETE FROM public.cache_table WHERE cache_key LIKE '%blog_list%';"
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
+    purge_cache_fragments(fragment__in=["next_prev", "blog_list"])
+
+
+def get_adjacent_pages(queryset, page, *order_by):
+    """
+    Return the (preceding, following) objects either side of page in queryset when
+    ordered by order_by (e.g. '-published', '-first_published_at').
+    Neighbours are found with LAG/LEAD over the ordered set in a single query, then
+    fetched by primary key - two queries regardless of the size of the set.
+    Either item is None at the ends of the set or if page is not in it.
+    """
+    model = queryset.model
+    ordering = [
+        F(field[1:]).desc() if field.startswith("-") else F(field).asc()
+        for field in order_by
+    ] + [F("pk").desc()]
+    # filter by pk subquery so filter joins (e.g. tags__slug__in) can't duplicate rows
+    ranked = model.objects.filter(pk__in=queryset.values("pk")).annotate(
+        preceding_id=Window(Lag("pk"), order_by=ordering),
+        following_id=Window(Lead("pk"), order_by=ordering),
+    ).values("preceding_id", "following_id", row_id=F("pk"))
+
+    sql, params = ranked.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT preceding_id, following_id FROM ({sql}) ranked WHERE row_id = %s",
+            [*params, page.pk],
+        )
+        row = cursor.fetchone()
+
+    if not row or not any(row):
+        return None, None
+    neighbours = queryset.in_bulk([pk for pk in row if pk])
+    return neighbours.get(row[0]), neighbours.get(row[1])
 
 
 def paginator_range(requested_page, last_page_num, wing_size=5):
@@ -164,6 +269,21 @@ def get_streamfield_text(
 
     inner_text = " ".join(soup.findAll(text=True))
 
+    return clean_extracted_text(
+        inner_text,
+        strip_newlines=strip_newlines,
+        strip_punctuation=strip_punctuation,
+        lowercase=lowercase,
+    )
+
+
+def clean_extracted_text(
+    inner_text, strip_newlines=True, strip_punctuation=True, lowercase=False
+):
+    """
+    Normalise text extracted from a StreamField for word counts and comparison.
+    Shared by get_streamfield_text() and core.streamfield_text.extract_streamfield_text().
+    """
     # replace &nbsp; with space
     inner_text = inner_text.replace("\xa0", " ")
 
@@ -1,26 +1,38 @@
-import html
-from urllib.parse import urlparse, urlsplit
+import gzip
+from urllib.parse import urlsplit
 
 import requests
 import validators
-from bs4 import BeautifulSoup
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import redirect
-from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
 from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 from django.views import View
 from django.views.decorators.http import require_GET
 from django.views.generic import TemplateView
+from wagtail.admin.auth import require_admin_access
 from wagtail.models import Site
 
+from .external_content import (NoHeadError, NonPublicUrlError,
+                               check_image_urls, get_external_metadata,
+                               get_http_session)
+from .geoip import lookup_country
+from .sitemap import get_sitemap
 from .utils import clear_page_cache
 
 
+@method_decorator(require_admin_access, name="dispatch")
 class ExternalContentProxy(View):
+    """
+    Metadata lookup for the ExternalLinkEmbedBlock editor - admin users only.
+    The page and any redirects must be on public addresses (see is_public_url).
+    """
     def get(self, request):
         url = request.GET.get("url", "")  # Get the URL parameter from the query string
 
@@ -34,70 +46,14 @@ class ExternalContentProxy(View):
             return JsonResponse({"error": "Invalid URL format"})
 
         try:
-            response = requests.get(url)
-
-            # update url with resolved address
-            url = response.url
-
-            # Find the start and end positions of the <head> tag
-            content = response.text
-            head_start = content.find("<head")
-            head_end = content.find("</head>", head_start) + len("</head>")
-
-            if head_start == -1 or head_end == -1:
-                return JsonResponse({"error": "No <head> tag found"})
-
-            # Extract and parse the <head> content using BeautifulSoup
-            head_content = content[head_start:head_end]
-            head_soup = BeautifulSoup(head_content, "html.parser")
-
-            title = self.extract_metadata(
-                head_soup,
-                [
-                    "og:title",
-                    "itemprop:name",
-                    "twitter:title",
-                ],
-            )
-
-            description = self.extract_metadata(
-                head_soup,
-                [
-                    "og:description",
-                    "itemprop:description",
-                    "twitter:description",
-                    'meta[name="description"]',
-                ],
-            )
-            if description:
-                description = html.unescape(description)
-
-            image = (
-                self.extract_metadata(
-                    head_soup,
-                    [
-                        "og:image",
-                        "itemprop:image",
-                        "twitter:image",
-                    ],
-                )
-                or ""
-            )
-
-            # attempt to fix relative image url
-            if image and image.startswith("/"):
-                parsed_url = urlparse(url)
-                image = f"{parsed_url.scheme}://{parsed_url.netloc}{image}"
-
-            metadata = {
-                "url": url,
-                "title": title,
-                "description": description,
-                "image": image,
-            }
-
-            return JsonResponse(metadata)
-
+            return JsonResponse(get_external_metadata(url))
+
+        except NoHeadError:
+            return JsonResponse({"error": "No <head> tag found"})
+        except NonPublicUrlError as e:
+            return JsonResponse({"error": f"{e} does not resolve to a public address."})
+        except requests.exceptions.Timeout:
+            return JsonResponse({"error": f"Timed out fetching {url}."})
         except requests.exceptions.ConnectionError as e:
             if "getaddrinfo failed" in str(e):
                 return JsonResponse({"error": f"Failed to resolve {url}."})
@@ -105,49 +61,28 @@ class ExternalContentProxy(View):
         except Exception as e:
             return JsonResponse({"error": str(e)})
 
-    def extract_metadata(self, soup, keys):
-        for key in keys:
-            meta_tag = soup.find("meta", attrs={"property": key})
-            if not meta_tag:
-                meta_tag = soup.find("meta", attrs={"itemprop": key})
-            if not meta_tag:
-                meta_tag = soup.find("meta", attrs={"name": key})
-            if meta_tag:
-                if keys[0] == "og:title" and not meta_tag["content"]:
-                    title_tag = soup.find("title")
-                    if title_tag:
-                        return title_tag.string
-                return meta_tag["content"]
-
-        if keys[0] == 'meta[name="description"]':
-            description_tag = soup.find("meta", attrs={"name": "description"})
-            if description_tag:
-                return description_tag["content"]
-
-        if keys[0] == "og:title":
-            title_tag = soup.find("title")
-            if title_tag:
-                return title_tag.string
-
-        return None
-
 
+@require_admin_access
+@require_GET
 def check_image_url(request):
-    image_url = request.GET.get("url")
-
-    if not image_url:
+    """
+    Image url check for the ExternalLinkEmbedBlock editor - admin users only.
+    ?url=<url> returns {"valid": bool}
+    Repeat the parameter (?url=<url1>&url=<url2>...) to check up to
+    IMAGE_URL_CHECK_MAX_BATCH urls concurrently: returns {"results": {url: bool}}
+    """
+    image_urls = [url for url in request.GET.getlist("url") if url]
+
+    if not image_urls:
         return JsonResponse({"valid": False})
 
-    try:
-        response = requests.head(image_url)
-        if response.status_code == 200 and response.headers.get(
-            "Content-Type", ""
-        ).startswith("image/"):
-            return JsonResponse({"valid": True})
-        else:
-            return JsonResponse({"valid": False})
-    except requests.RequestException:
-        return JsonResponse({"valid": False})
+    if len(image_urls) == 1:
+        return JsonResponse({"valid": check_image_urls(image_urls)[image_urls[0]]})
+
+    max_batch = getattr(settings, "IMAGE_URL_CHECK_MAX_BATCH", 50)
+    if len(image_urls) > max_batch:
+        return JsonResponse({"error": f"A maximum of {max_batch} urls can be checked at once"}, status=400)
+    return JsonResponse({"results": check_image_urls(image_urls)})
 
 
 @login_required()
@@ -169,45 +104,57 @@ class RobotsView(TemplateView):
 
 def sitemap(request):
     site = Site.find_for_request(request)
-    urlset = []
-    for locale_home in site.root_page.get_translations(inclusive=True).defer_streamfields():
-        for child_page in locale_home.get_descendants(inclusive=True).defer_streamfields().live().public().specific():
-            if getattr(child_page, 'search_engine_index', True) is False:
-                continue
-            entry = child_page.get_sitemap_urls()
-            if isinstance(entry, list):
-                urlset.extend(entry)
-            else:
-                urlset.append(entry)
-    try:
-        urlset.remove([])
-    except Exception:
-        pass
-    last_modified = max([x['lastmod'] for x in urlset])
-
-    return TemplateResponse(
-        request,
-        template='sitemap.xml',
-        context={'urlset': urlset},
-        content_type='application/xml',
-        headers={
-            "X-Robots-Tag": "noindex, noodp, noarchive",
-            "last-modified": http_date(last_modified.timestamp()),
-            "vary": "Accept-Encoding",
-        }
+    sitemap = get_sitemap(site)
+    return sitemap_response(request, sitemap["index"] or sitemap["shards"][0])
+
+
+def sitemap_shard(request, shard):
+    site = Site.find_for_request(request)
+    sitemap = get_sitemap(site)
+    if not sitemap["index"] or not 0 < shard <= len(sitemap["shards"]):
+        raise Http404
+    return sitemap_response(request, sitemap["shards"][shard - 1])
+
+
+def sitemap_response(request, document):
+    """Serve a pre-gzipped sitemap document, decompressing only for clients without gzip"""
+    etag = document["etag"]
+    response = HttpResponse(content_type="application/xml")
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        response.content = document["gzip"]
+        response["Content-Encoding"] = "gzip"
+        # strong etags are per representation
+        etag = f'{etag[:-1]}-gzip"'
+    else:
+        response.content = gzip.decompress(document["gzip"])
+    response["ETag"] = etag
+    response["X-Robots-Tag"] = "noindex, noodp, noarchive"
+    response["Vary"] = "Accept-Encoding"
+    if document["lastmod"]:
+        response["Last-Modified"] = http_date(document["lastmod"])
+    return get_conditional_response(
+        request, etag=etag, last_modified=document["lastmod"], response=response
     )
 
 @require_GET
 def user_country(request):
     ip = get_client_ip(request)
 
+    # local range table first - no network or cache access
+    country = lookup_country(ip)
+    if country:
+        return JsonResponse({"ISO": country})
+
+    if not getattr(settings, "IP_COUNTRY_API_FALLBACK", True):
+        return JsonResponse({"ISO": "xx"})
+
     cache_key = f"user-country:{ip}"
     cached = cache.get(cache_key)
     if cached:
         return JsonResponse(cached)
 
     try:
-        r = requests.get(f"https://ipwho.is/{ip}", timeout=2)
+        r = get_http_session().get(f"https://ipwho.is/{ip}", timeout=2)
         data = r.json()
         country = data.get("country_code", "xx")
     except Exception as e:
@@ -225,5 +172,5 @@ def user_country(request):
 def get_client_ip(request):
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
     if x_forwarded_for:
-        return x_forwarded_for.split(",")[0]
+        return x_forwarded_for.split(",")[0].strip()
     return request.META.get("REMOTE_ADDR")
\ No newline at end of file
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.db import transaction
 from django.http import HttpResponse
 from django.templatetags.static import static
 from django.urls import reverse
@@ -6,12 +7,19 @@ from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from wagtail import hooks
 from wagtail.admin.menu import MenuItem
+from wagtail.models import Page, Site
 
 from .documents.views.chooser import viewset as document_chooser_viewset
 from .draftail_extensions import (register_block_feature,
                                   register_inline_styling)
+from .page_cache import purge_page_responses
+from .related import get_affected_page_ids, update_related_pages_task
+from .renditions import get_page_rendition_specs, warm_renditions
+from .sitemap import invalidate_sitemap, update_sitemap_pages
 from .thumbnails import ThumbnailOperation
-from .utils import get_custom_icons, purge_page_cache_fragments
+from .utils import (get_custom_icons, purge_head_cache_fragments,
+                    purge_page_cache_fragments,
+                    purge_section_head_cache_fragments)
 
 @hooks.register('insert_global_admin_js')
 def register_admin_js():
@@ -197,6 +205,73 @@ def register_refresh_cache_menu_item():
 @hooks.register('after_delete_page')
 def do_after_delete_page(request, page):
     purge_page_cache_fragments(page.slug)
+    purge_sibling_page_responses(page)
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+def purge_page_responses_after_publish(request, page):
+    purge_sibling_page_responses(page)
+
+@hooks.register('after_move_page')
+def purge_page_responses_after_move(request, page):
+    # descendant urls change with the moved page
+    purge_page_responses(*page.get_descendants(inclusive=True).values_list('pk', flat=True))
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+@hooks.register('after_delete_page')
+def purge_translation_heads(request, page):
+    # the cached <head> of every translation lists this page's hreflang alternate
+    slugs = Page.objects.filter(translation_key=page.translation_key).values_list('slug', flat=True)
+    purge_head_cache_fragments(page.slug, *slugs)
+
+@hooks.register('after_move_page')
+def purge_translation_heads_after_move(request, page):
+    purge_section_head_cache_fragments(page)
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+def update_sitemap_after_publish(request, page):
+    # alternates of every translation change with this page
+    update_sitemap_pages(page.get_translations(inclusive=True).values_list('pk', flat=True))
+
+@hooks.register('after_move_page')
+def update_sitemap_after_move(request, page):
+    update_sitemap_pages(page.get_descendants(inclusive=True).values_list('pk', flat=True))
+
+@hooks.register('after_delete_page')
+def update_sitemap_after_delete(request, page):
+    # entries for the page and its descendants are removed by cascade
+    update_sitemap_pages(Page.objects.filter(translation_key=page.translation_key).values_list('pk', flat=True))
+    invalidate_sitemap(*Site.objects.values_list('pk', flat=True))
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+def update_related_pages_after_publish(request, page):
+    model = page.specific_class
+    if hasattr(model, 'related_pages_order'):
+        page_ids = get_affected_page_ids(page)
+        transaction.on_commit(lambda: update_related_pages_task.enqueue(
+            model._meta.app_label, model._meta.model_name, page_ids
+        ))
+
+@hooks.register('after_publish_page')
+def warm_page_renditions(request, page):
+    # generated by the rendition workers before the page is first requested
+    warm_renditions(get_page_rendition_specs(page.specific))
+
+@hooks.register('after_delete_page')
+def update_related_pages_after_delete(request, page):
+    # rows pointing at the page went with it - refill the lists it was in
+    model = page.specific_class
+    if hasattr(model, 'related_pages_order'):
+        transaction.on_commit(lambda: update_related_pages_task.enqueue(
+            model._meta.app_label, model._meta.model_name
+        ))
+
+def purge_sibling_page_responses(page):
+    # siblings render next/previous and related links to this page
+    purge_page_responses(page.pk, *page.get_siblings(inclusive=False).values_list('pk', flat=True))
 
 @hooks.register("register_icons")
 def register_icons(icons):
@@ -23,6 +23,8 @@ INSTALLED_APPS = [
     'django_comments_xtd',
     'django_comments',
     'django_extensions',
+    'django_tasks',
+    'django_tasks.backends.database',
     'wagtail_localize',
     'wagtail_localize.locales',
 
@@ -76,6 +78,7 @@ MIDDLEWARE = [
     'django.middleware.locale.LocaleMiddleware',
     "allauth.account.middleware.AccountMiddleware",
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
+    'core.middleware.PageResponseCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'enzedonline.urls'
@@ -139,22 +142,68 @@ WAGTAIL_CONTENT_LANGUAGES = LANGUAGES = [
     ('en', "English"),
 ]
 
+# DatabaseCache with an in-process LRU in front (see core/cache/backends.py)
+# LOCAL_MAX_BYTES: size of per-worker memory tier
+# GENERATION_CHECK_INTERVAL: seconds a worker may serve stale fragments after a purge
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'BACKEND': 'core.cache.backends.TwoTierDatabaseCache',
         'LOCATION': 'cache_table',
         'TIMEOUT': None,
+        'OPTIONS': {
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'GENERATION_CHECK_INTERVAL': 5,
+        }
     },
     'renditions': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'BACKEND': 'core.cache.backends.TwoTierDatabaseCache',
         'LOCATION': 'image_cache',
         'TIMEOUT': 600,
         'OPTIONS': {
-            'MAX_ENTRIES': 2000
+            'MAX_ENTRIES': 2000,
+            'LOCAL_MAX_BYTES': 8 * 1024 * 1024,
+            'GENERATION_CHECK_INTERVAL': 5,
         }
     }
 }
 
+# FULL PAGE CACHE (anonymous responses for pages with cache_response = True)
+FULL_PAGE_CACHE_ALIAS = 'default'
+FULL_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# query parameters the cached pages read - requests with any other parameter are not cached
+FULL_PAGE_CACHE_QUERY_PARAMS = ['category', 'tag']
+
+# LISTING PAGINATION - keyset (cursor) pages for blog, recipe and travel listings
+# page counts/ranges are cached for KEYSET_PAGINATION_CACHE_TIMEOUT seconds
+KEYSET_PAGINATION = True
+KEYSET_PAGINATION_CACHE_TIMEOUT = 300
+
+# RELATED PAGES - entries kept per page in the related recipes/posts index
+RELATED_PAGES_COUNT = 5
+
+# SITEMAP - urls per shard before /sitemap.xml becomes a sitemap index
+SITEMAP_SHARD_SIZE = 5000
+
+# EXTERNAL CONTENT - metadata fetched for ExternalLinkEmbedBlock
+EXTERNAL_CONTENT_TIMEOUT = (3.05, 5)  # (connect, read) seconds
+EXTERNAL_CONTENT_MAX_BYTES = 512 * 1024  # stop reading if </head> not found by here
+EXTERNAL_CONTENT_MAX_REDIRECTS = 5  # each hop must resolve to a public address
+EXTERNAL_CONTENT_CACHE_TIMEOUT = 60 * 60 * 6
+# image url checks - failures are cached briefly so fixed links show up quickly
+IMAGE_URL_VALID_CACHE_TIMEOUT = 60 * 60 * 24
+IMAGE_URL_INVALID_CACHE_TIMEOUT = 60 * 5
+IMAGE_URL_CHECK_MAX_BATCH = 50
+
+# IP TO COUNTRY - table built with ./manage.py build_ip_country_table <csv files>
+IP_COUNTRY_TABLE = os.path.join(BASE_DIR, 'data', 'ip-country.bin')
+# query ipwho.is for addresses not in the table (or if no table has been built)
+IP_COUNTRY_API_FALLBACK = True
+
+# SEARCH HITS - buffered per process, flushed to search promotions in bulk
+SEARCH_HIT_FLUSH_SIZE = 100
+SEARCH_HIT_FLUSH_INTERVAL = 30
+SEARCH_HIT_SPOOL_DIR = os.path.join(BASE_DIR, 'data', 'search-hits')
+
 # ADVANCED CACHE
 ADV_CACHE_RESOLVE_NAME = True
 ADV_CACHE_INCLUDE_PK = True
@@ -200,19 +249,15 @@ WAGTAILEMBEDS_RESPONSIVE_HTML = True
 # change search config to 'simple' if needing multi-lingual
 WAGTAILSEARCH_BACKENDS = {
     'default': {
-        'BACKEND': 'wagtail.search.backends.database',
+        # database (PostgreSQL) backend with one text search config per locale
+        # front end searches use the active locale's config - see search/backends.py
+        'BACKEND': 'search.backends',
         'SEARCH_CONFIG': 'english_extended',
+        'LOCALE_SEARCH_CONFIGS': {
+            'en': 'english_extended',
+            'es': 'spanish_extended',
+        },
     },
-    # 'es': {
-    #     'BACKEND': 'wagtail.search.backends.database',
-    #     'SEARCH_CONFIG': 'spanish_extended',
-    #     'INDEX' : 'es'
-    # },
-    # 'en': {
-    #     'BACKEND': 'wagtail.search.backends.database',
-    #     'SEARCH_CONFIG': 'english_extended',
-    #     'INDEX' : 'en'
-    # },
 }
 
 # WAGTAIL AUTOSAVE AND PREVIEW SETTINGS
@@ -295,6 +340,26 @@ WAGTAILADMIN_RICH_TEXT_EDITORS = {
     },
 }
 
+# BACKGROUND TASKS
+# wagtail's own tasks (search index, references) run in the request as before
+# renditions are generated ahead by a bounded pool of database workers, e.g. 2 x
+#   python manage.py db_worker --backend renditions --queue-name renditions
+# related pages indexes are rebuilt after publish/delete by a single worker
+#   python manage.py db_worker --backend background --queue-name related-pages
+TASKS = {
+    'default': {
+        'BACKEND': 'django_tasks.backends.immediate.ImmediateBackend',
+    },
+    'renditions': {
+        'BACKEND': 'django_tasks.backends.database.DatabaseBackend',
+        'QUEUES': ['renditions'],
+    },
+    'background': {
+        'BACKEND': 'django_tasks.backends.database.DatabaseBackend',
+        'QUEUES': ['related-pages'],
+    },
+}
+
 WAGTAILMETADATA_IMAGE_FILTER = "thumbnail-1200x800|format-png"
 
 # FIX NEEDED FOR DJANGO 3.2.x
@@ -9,7 +9,8 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
 from core.views import (ExternalContentProxy, RobotsView, check_image_url,
-                        refresh_page_cache, sitemap, user_country)
+                        refresh_page_cache, sitemap, sitemap_shard,
+                        user_country)
 from search.views import enzed_search
 from userauth.views import (CustomPasswordChangeView, CustomPasswordSetView,
                             CustomUserDeleteView, CustomUserUpdateView,
@@ -35,6 +36,7 @@ urlpatterns = [
     path('documents/', include(wagtaildocs_urls)),
     re_path(r'^robots\.txt$', RobotsView.as_view(), name='robots'),
     re_path(r'^sitemap.xml$', sitemap, name='sitemap'),
+    path('sitemap-<int:shard>.xml', sitemap_shard, name='sitemap-shard'),
     re_path(r'^comments/', include('django_comments_xtd.urls')),
     path('sentry-debug/', trigger_error),
     path(r'jsi18n/', JavaScriptCatalog.as_view(), name='javascript-catalog'),
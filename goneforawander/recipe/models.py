@@ -1,18 +1,35 @@
+import hashlib
+import json
+
 from django import forms
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.db import models
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalManyToManyField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, TitleFieldPanel
 from wagtail.contrib.routable_page.models import RoutablePageMixin, path, route
 from wagtail.fields import RichTextField
+from wagtail.images import get_image_model
+from wagtail.models import Locale, Site
 from wagtail.search import index
-from django.http import JsonResponse
 
 from core.models import SEOPage
+from core.pagination import (decode_cursor, encode_cursor, get_cursor_page,
+                             get_paginator)
 from core.panels import M2MChooserPanel
+from core.renditions import CARD_SPECS, prefetch_renditions
 from core.utils import ConstGroup
+from search.backends import get_locale_search_backend
+from search.cache import SearchResultList, get_search_result_ids
+
+API_IMAGE_SPEC = "thumbnail-500x250"
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
 
 RTF_DESCRIPTION = ['bold', 'italic', 'link']
 RTF_INGREDIENTS = ['h5', 'bold', 'italic', 'ol', 'ul', 'hr']
@@ -88,6 +105,9 @@ class RecipePage(SEOPage):
     template = "recipe/recipe-page.html"
     parent_page_types = ["goneforawander.RecipeListingPage"]
     subpage_types = []
+    cache_response = True
+    # recency tie-break for the related recipes index
+    related_pages_order = ('-first_published_at',)
 
     description = RichTextField(features=RTF_DESCRIPTION, null=True, blank=False, verbose_name=_("Recipe Foreword"))
     prep_time = models.PositiveIntegerField(null=True, blank=False, default=0, verbose_name=_("Preparation Time (minutes)"))
@@ -118,10 +138,29 @@ class RecipePage(SEOPage):
     class Meta:
         verbose_name = _("Recipe Page")
 
+    @classmethod
+    def get_indexed_objects(cls):
+        # tags_text reads the prefetched tags - one query per indexing batch, not per page
+        return super().get_indexed_objects().prefetch_related("tags")
+
+    @cached_property
+    def tag_groups(self):
+        """
+        This recipe's tags, loaded once: {"all": [RecipeTag], tag_type: [tag names]}
+        grouped by RecipeTagTypes. Uses prefetched tags when present.
+        """
+        tags = list(self.tags.all())
+        groups = {"all": tags}
+        for tag_type in (RecipeTagTypes.CUISINE, RecipeTagTypes.CATEGORY, RecipeTagTypes.KEYWORD):
+            groups[tag_type] = []
+        for tag in tags:
+            groups.setdefault(tag.tag_type, []).append(tag.name)
+        return groups
+
     @property
     def tags_text(self) -> str:
         # Make tags searchable and slash-friendly
-        names = list(self.tags.values_list("name", flat=True))
+        names = [tag.name for tag in self.tag_groups["all"]]
         cleaned = []
         for n in names:
             # add both original and a slash-normalized variant
@@ -137,26 +176,21 @@ class RecipePage(SEOPage):
 
     def related_recipes(self, limit=5):
         """
-        Return up to `limit` RecipePage objects that share the most tags with this page.
-        Excludes self. Ordered by shared tag count (desc) then most recent first.
+        Return up to `limit` RecipePage objects that share the most tags with this page,
+        most recent first on ties, from the precomputed index (see core.related).
         """
-        tag_ids = list(self.tags.values_list("id", flat=True))
-        if not tag_ids:
-            return RecipePage.objects.none()
-
         return (
             RecipePage.objects.live()
-            .exclude(pk=self.pk)
-            .filter(tags__in=tag_ids)
-            .annotate(match_count=Count("tags", filter=Q(tags__in=tag_ids), distinct=True))
-            .order_by("-match_count", "-first_published_at")[:limit]
+            .filter(related_page_entries__page=self.pk, related_page_entries__rank__lt=limit)
+            .order_by("related_page_entries__rank")
         )
     
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        context['category_tags'] = list(self.tags.filter(tag_type=RecipeTagTypes.CATEGORY).values_list("name", flat=True))
-        context['cuisine_tags'] = list(self.tags.filter(tag_type=RecipeTagTypes.CUISINE).values_list("name", flat=True))
-        context['keyword_tags'] = list(self.tags.filter(tag_type=RecipeTagTypes.KEYWORD).values_list("name", flat=True))
+        context['recipe_tags'] = self.tag_groups["all"]
+        context['category_tags'] = self.tag_groups[RecipeTagTypes.CATEGORY]
+        context['cuisine_tags'] = self.tag_groups[RecipeTagTypes.CUISINE]
+        context['keyword_tags'] = self.tag_groups[RecipeTagTypes.KEYWORD]
         context['related_recipes'] = self.related_recipes()
         if self.prep_time:
             context['prep_time_hours'] = self.prep_time // 60
@@ -213,18 +247,75 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
         FieldPanel("intro"),
     ]
 
-    # A method to return json of queryset - title, image, url, summary, first_published_at
-    def to_json(self, qs):
-        return [
-            {
-                "title": recipe.title,
-                "summary": recipe.summary,
-                "image": recipe.search_image.get_rendition("thumbnail-500x250").url if recipe.search_image else None,
-                "first_published_at": recipe.first_published_at.isoformat(),
-                "url": recipe.url,
-            }
-            for recipe in qs
-        ]
+    # json for one recipe in the api - title, image, url, summary, first_published_at
+    def to_json(self, recipe, request=None):
+        return {
+            "title": recipe.title,
+            "summary": recipe.summary,
+            "image": recipe.search_image.get_rendition(API_IMAGE_SPEC).url if recipe.search_image else None,
+            "first_published_at": recipe.first_published_at.isoformat(),
+            "url": recipe.get_url(request),
+        }
+
+    def api_queryset(self):
+        """Live recipes with search images and their api renditions fetched in bulk"""
+        renditions = get_image_model().get_rendition_model().objects.filter(filter_spec=API_IMAGE_SPEC)
+        return RecipePage.objects.live().select_related("search_image").prefetch_related(
+            Prefetch("search_image__renditions", queryset=renditions)
+        )
+
+    def stream_json(self, request, page_ids):
+        recipes = self.api_queryset().in_bulk(page_ids)
+        yield "["
+        separator = ""
+        for pk in page_ids:
+            if pk in recipes:
+                yield separator + json.dumps(self.to_json(recipes[pk], request))
+                separator = ","
+        yield "]"
+
+    def api_response(self, request, qs):
+        """
+        Stream a json list of the recipes in qs (a queryset or SearchResultList), one page
+        of ?limit= rows from ?cursor=. The next page is in the Link header (rel="next").
+        ETag and Last-Modified come from the ids and last_published_at of the page so a
+        revalidation is a single query on the page keys.
+        """
+        try:
+            limit = min(max(int(request.GET.get("limit", API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = API_PAGE_SIZE
+        cursor = request.GET.get("cursor")
+
+        if isinstance(qs, SearchResultList):
+            # ranked ids are already cached - the cursor is an offset into them
+            values = decode_cursor(cursor) if cursor else None
+            offset = values[0] if values and isinstance(values[0], int) and values[0] > 0 else 0
+            page_ids = qs.page_ids[offset:offset + limit]
+            next_cursor = encode_cursor([offset + limit]) if len(qs.page_ids) > offset + limit else None
+            published = dict(
+                RecipePage.objects.live().filter(pk__in=page_ids).values_list("pk", "last_published_at")
+            )
+            rows = [(pk, published[pk]) for pk in page_ids if pk in published]
+        else:
+            rows, next_cursor = get_cursor_page(qs, limit, cursor, fields=("pk", "last_published_at"))
+
+        page_ids = [pk for pk, _ in rows]
+        last_modified = max((published for _, published in rows if published), default=None)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        version = ",".join(f"{pk}:{published.timestamp() if published else ''}" for pk, published in rows)
+        etag = f'"{hashlib.md5(f"{API_IMAGE_SPEC}|{next_cursor}|{version}".encode("utf-8")).hexdigest()}"'
+
+        response = StreamingHttpResponse(self.stream_json(request, page_ids), content_type="application/json")
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        if next_cursor:
+            query = request.GET.copy()
+            query["cursor"] = next_cursor
+            query["limit"] = limit
+            response["Link"] = f'<{request.path}?{query.urlencode()}>; rel="next"'
+        return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
 
     def tag_filters(self):
         tags = RecipeTag.objects.in_use()
@@ -243,8 +334,9 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
 
         param_name: the GET parameter to read the page number from (?p=2)
         on_each_side / on_ends: controls the elision around the current page
+        Querysets are keyset paginated when KEYSET_PAGINATION is on (see core.pagination)
         """
-        paginator = Paginator(qs, per_page)
+        paginator = get_paginator(qs, per_page, cursor=request.GET.get("cursor"))
         page_number = request.GET.get(param_name)
 
         try:
@@ -253,6 +345,8 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
             page_obj = paginator.page(1)
         except EmptyPage:
             page_obj = paginator.page(paginator.num_pages)
+        # card images and renditions for the whole page in a constant number of queries
+        page_obj.object_list = prefetch_renditions(page_obj.object_list, CARD_SPECS)
 
         page_range = list(paginator.get_elided_page_range(
             page_obj.number,
@@ -265,6 +359,25 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
             "page_range": page_range,
         }
 
+    def search_results(self, request, search_query):
+        """
+        Live RecipePages of the active locale matching search_query, ranked by relevance.
+        The ranked ids are cached until the next publish (see search.cache).
+        """
+        qs = RecipePage.objects.live()
+        if not search_query:
+            return qs
+        locale = Locale.get_active()
+        backend = get_locale_search_backend(locale)
+        page_ids = get_search_result_ids(
+            lambda: backend.search(search_query, qs.filter(locale=locale), order_by_relevance=True),
+            scope="recipes",
+            site=Site.find_for_request(request),
+            locale=locale,
+            query=search_query,
+        )
+        return SearchResultList(page_ids, qs)
+
     class Meta:
         verbose_name = _("Recipe Listing Page")
 
@@ -309,9 +422,7 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
     @path("search/")
     def search(self, request):
         search_query = request.GET.get("q", None)
-        qs = RecipePage.objects.live()
-        if search_query:
-            qs = qs.search(search_query, order_by_relevance=True)
+        qs = self.search_results(request, search_query)
         pagination = self.paginate_qs(qs, request)
         return self.render(
             request,
@@ -328,15 +439,13 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
     @path("api/")
     def api_root(self, request):
         qs = RecipePage.objects.live().order_by('-first_published_at')
-        return JsonResponse(self.to_json(qs), safe=False)
+        return self.api_response(request, qs)
     
     @path("api/search/")
     def api_search(self, request):
         search_query = request.GET.get("q", None)
-        qs = RecipePage.objects.live()
-        if search_query:
-            qs = qs.search(search_query, order_by_relevance=True)
-        return JsonResponse(self.to_json(qs), safe=False)
+        qs = self.search_results(request, search_query)
+        return self.api_response(request, qs)
     
     @route(r"^api/tags/(?P<tags_path>.+)/?$")
     def filter_by_tags_api(self, request, tags_path):
@@ -347,4 +456,4 @@ class RecipeListingPage(RoutablePageMixin, SEOPage):
             .annotate(match_count=Count('tags', filter=Q(tags__slug__in=tag_list), distinct=True))
             .order_by('-match_count', '-first_published_at')
         )
-        return JsonResponse(self.to_json(qs), safe=False)
\ No newline at end of file
+        return self.api_response(request, qs)
\ No newline at end of file
@@ -9,7 +9,8 @@ from wagtail.search import index
 from blocks.streamblocks.grid import GridStreamBlock
 from core.models import SEOPage
 from core.panels import RichHelpPanel, M2MChooserPanel
-from core.utils import count_words, get_streamfield_text
+from core.streamfield_text import extract_streamfield_text
+from core.utils import count_words, get_adjacent_pages
 
 
 class TravelBlogPage(SEOPage):
@@ -82,26 +83,12 @@ class TravelBlogPage(SEOPage):
         context = super().get_context(request, *args, **kwargs)
         siblings = self.__class__.objects.sibling_of(self).defer_streamfields().live()
 
-        context['next_post'], context['previous_post'] = self.get_next_prev(
-            siblings.order_by('-published', '-first_published_at')
-        )
+        context['next_post'], context['previous_post'] = self.get_next_prev(siblings)
 
         return context
 
     def get_next_prev(self, queryset):
-        idx = self.get_queryset_index(queryset)
-        return (
-            queryset[idx-1] if idx > 0 else None,
-            queryset[idx+1] if (idx != -1 and idx <
-                                queryset.count()-1) else None
-        )
-
-    def get_queryset_index(self, queryset):
-        li = list(queryset.values_list('path'))
-        try:
-            return li.index((self.path,))
-        except:
-            return -1
+        return get_adjacent_pages(queryset, self, '-published', '-first_published_at')
 
     # def save(self, *args, **kwargs):
     #     purge_blog_list_cache_fragments()
@@ -115,8 +102,11 @@ class TravelBlogPage(SEOPage):
     #     return self.__class__.__name__
 
     def corpus(self):
-        return get_streamfield_text(
-            self.body, strip_tags=["style", "script", "code"]
+        # called from after_create/edit_page where body holds the latest revision
+        return extract_streamfield_text(
+            self.body,
+            strip_tags=["style", "script", "code"],
+            revision_id=self.latest_revision_id,
         )
 
     def get_wordcount(self, corpus=None):
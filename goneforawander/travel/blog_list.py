@@ -1,12 +1,17 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.db import models
 from django.db.models import Count, Q
 from django.utils.translation import gettext_lazy as _
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.contrib.routable_page.models import RoutablePageMixin, path, route
 from wagtail.fields import RichTextField
+from wagtail.models import Locale, Site
 
 from core.models import SEOPage
+from core.pagination import get_paginator
+from core.renditions import CARD_SPECS, prefetch_renditions
+from search.backends import get_locale_search_backend
+from search.cache import SearchResultList, get_search_result_ids
 
 from .blog_detail import TravelBlogPage
 from .tags import TravelBlogTag, TravelBlogTagTypes
@@ -71,8 +76,9 @@ class TravelBlogListingPage(RoutablePageMixin, SEOPage):
 
         param_name: the GET parameter to read the page number from (?p=2)
         on_each_side / on_ends: controls the elision around the current page
+        Querysets are keyset paginated when KEYSET_PAGINATION is on (see core.pagination)
         """
-        paginator = Paginator(qs, per_page)
+        paginator = get_paginator(qs, per_page, cursor=request.GET.get("cursor"))
         page_number = request.GET.get(param_name)
 
         try:
@@ -81,6 +87,8 @@ class TravelBlogListingPage(RoutablePageMixin, SEOPage):
             page_obj = paginator.page(1)
         except EmptyPage:
             page_obj = paginator.page(paginator.num_pages)
+        # card images and renditions for the whole page in a constant number of queries
+        page_obj.object_list = prefetch_renditions(page_obj.object_list, CARD_SPECS)
 
         page_range = list(paginator.get_elided_page_range(
             page_obj.number,
@@ -93,6 +101,25 @@ class TravelBlogListingPage(RoutablePageMixin, SEOPage):
             "page_range": page_range,
         }
 
+    def search_results(self, request, search_query):
+        """
+        Live TravelBlogPages of the active locale matching search_query, ranked by relevance.
+        The ranked ids are cached until the next publish (see search.cache).
+        """
+        qs = TravelBlogPage.objects.live()
+        if not search_query:
+            return qs
+        locale = Locale.get_active()
+        backend = get_locale_search_backend(locale)
+        page_ids = get_search_result_ids(
+            lambda: backend.search(search_query, qs.filter(locale=locale), order_by_relevance=True),
+            scope="travel",
+            site=Site.find_for_request(request),
+            locale=locale,
+            query=search_query,
+        )
+        return SearchResultList(page_ids, qs)
+
     class Meta:
         verbose_name = _("Travel Blog Listing Page")
 
@@ -136,9 +163,7 @@ class TravelBlogListingPage(RoutablePageMixin, SEOPage):
     @path("search/")
     def search(self, request):
         search_query = request.GET.get("q", None)
-        qs = TravelBlogPage.objects.live()
-        if search_query:
-            qs = qs.search(search_query, order_by_relevance=True)
+        qs = self.search_results(request, search_query)
         pagination = self.paginate_qs(qs, request)
         return self.render(
             request,
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from wagtail.models import PageViewRestriction
+
+from .models import Menu
+from .tree import invalidate_menu_trees
+
+
+def invalidate_menus(raw=False, **kwargs):
+    # menu saved or deleted, or page privacy changed (autofill hides private pages)
+    if not raw:
+        invalidate_menu_trees()
+
+
+def register_signal_handlers():
+    for sender in (Menu, PageViewRestriction):
+        post_save.connect(invalidate_menus, sender=sender)
+        post_delete.connect(invalidate_menus, sender=sender)
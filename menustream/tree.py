@@ -0,0 +1,176 @@
+from django.core.cache import caches
+from django.db.models import Q
+from wagtail.models import Locale, Page, Site
+
+from core.utils import purge_menu_cache_fragments
+
+from .models import Menu
+
+MENU_TREE_KEY = "menu-tree:{}:{}:{}:{}"
+# link_block.html scales icons to the menu height, dropdown titles crop them square
+ICON_SPECS = {'page_link': 'height-25', 'url_link': 'height-25'}
+DEFAULT_ICON_SPEC = 'fill-25x25'
+
+
+def is_visible(value, authenticated):
+    """
+    Menu item display_when rule: 'ALWAYS', or 'True'/'False' for logged in/out only.
+    Items with no display_when are shown to logged in users only.
+    """
+    display_when = value.get('display_when', getattr(value, 'display_when', True))
+    return display_when == 'ALWAYS' or str(authenticated) == display_when
+
+
+def get_icon(image, spec):
+    if not image:
+        return None
+    rendition = image.get_rendition(spec)
+    return {'url': rendition.url, 'width': rendition.width, 'height': rendition.height, 'alt': rendition.alt}
+
+
+def get_autofill_links(value, request, authenticated):
+    """
+    Return ([{'title', 'url'}], parent included) for an autofill block: the (localized)
+    parent page if selected, then its live children in the chosen order. Private pages
+    are left out for anonymous users.
+    """
+    parent_page = value['parent_page']
+    if not parent_page:
+        return [], False
+    parent_page = parent_page.localized
+
+    pages = []
+    include_parent = value['include_parent_page'] and (
+        authenticated or not parent_page.get_view_restrictions().exists()
+    )
+    if include_parent:
+        pages.append(parent_page)
+    children = parent_page.get_children().live()
+    if value['only_show_in_menus']:
+        children = children.filter(show_in_menus=True)
+    if not authenticated:
+        children = children.public()
+    pages.extend(children.order_by(value['order_by'])[:value['max_items']])
+    return [{'title': page.title, 'url': page.get_url(request)} for page in pages], include_parent
+
+
+def compile_item(child, request, authenticated):
+    """
+    One menu stream child as a plain dict: its simple field values plus title, url,
+    icon, sticky, and the compiled items or autofill links where the block has them.
+    'template' is the block template that renders it.
+    """
+    value = child.value
+    node = {
+        name: field_value for name, field_value in value.items()
+        if field_value is None or isinstance(field_value, (str, bool, int))
+    }
+    page = value.get('page')
+    node.update({
+        'type': child.block_type,
+        'template': child.block.meta.template,
+        'title': getattr(value, 'title', None) or value.get('title', ''),
+        'url': page.get_url(request) if page else value.get('url'),
+        'sticky': bool(getattr(value, 'sticky', False) or value.get('sticky')),
+        'icon': get_icon(value.get('icon'), ICON_SPECS.get(child.block_type, DEFAULT_ICON_SPEC)),
+    })
+    if 'items' in value:
+        node['items'] = compile_items(value['items'], request, authenticated)
+    if 'parent_page' in value:
+        node['links'], node['include_parent_page'] = get_autofill_links(value, request, authenticated)
+    return node
+
+
+def compile_items(stream, request, authenticated):
+    return [
+        compile_item(child, request, authenticated)
+        for child in stream
+        if is_visible(child.value, authenticated)
+    ]
+
+
+def compile_menu(menu, request):
+    """
+    The menu as a serialisable tree for the request's site, locale and login state -
+    items the user can't see are left out. Rendered by menu/navbar.html.
+    """
+    authenticated = bool(getattr(getattr(request, 'user', None), 'is_authenticated', False))
+    brand_logo = menu.brand_logo.get_rendition('original') if menu.brand_logo else None
+    return {
+        'slug': menu.slug,
+        'breakpoint': menu.breakpoint,
+        'brand_title': menu.brand_title,
+        'brand_logo': {'url': brand_logo.url, 'alt': brand_logo.alt} if brand_logo else None,
+        'items': compile_items(menu.items, request, authenticated),
+    }
+
+
+def get_menu_tree(menu_slug, request):
+    """
+    compile_menu() of the menu with menu_slug, cached per (menu, locale, site, logged
+    in) until the menu or a page it shows changes (see invalidate_menu_trees).
+    None if there is no such menu.
+    """
+    authenticated = bool(getattr(getattr(request, 'user', None), 'is_authenticated', False))
+    site = getattr(request, 'site', None) or Site.find_for_request(request)
+    cache = caches["default"]
+    cache_key = MENU_TREE_KEY.format(
+        menu_slug, Locale.get_active().pk, getattr(site, 'pk', None), int(authenticated)
+    )
+    tree = cache.get(cache_key)
+    if tree is None:
+        menu = Menu.objects.filter(slug=menu_slug).select_related('brand_logo').first()
+        if menu is None:
+            return None
+        tree = compile_menu(menu, request)
+        cache.set(cache_key, tree, None)
+    return tree
+
+
+def invalidate_menu_trees():
+    """
+    Drop every cached menu tree and the navbar/footer fragments and full page
+    responses rendered from them
+    """
+    locale_ids = list(Locale.objects.values_list('pk', flat=True))
+    site_ids = [*Site.objects.values_list('pk', flat=True), None]
+    keys = [
+        MENU_TREE_KEY.format(slug, locale_id, site_id, authenticated)
+        for slug in Menu.objects.values_list('slug', flat=True)
+        for locale_id in locale_ids
+        for site_id in site_ids
+        for authenticated in (0, 1)
+    ]
+    caches["default"].delete_many(keys)
+    purge_menu_cache_fragments()
+
+
+def _collect_page_ids(raw_items, linked, parents):
+    for item in raw_items or []:
+        value = item.get('value') or {}
+        if value.get('page'):
+            linked.add(value['page'])
+        if value.get('parent_page'):
+            parents.add(value['parent_page'])
+        _collect_page_ids(value.get('items'), linked, parents)
+
+
+def menu_shows_page(page):
+    """
+    True if any menu shows page or could list it: a linked page or autofill parent in
+    any locale, one of their ancestors (their urls change with its slug) or a child of
+    an autofill parent. Menu items are read from the raw menu data.
+    """
+    linked, parents = set(), set()
+    for menu in Menu.objects.all():
+        _collect_page_ids(menu.items.raw_data, linked, parents)
+    if not (linked or parents):
+        return False
+    if Page.objects.filter(pk__in=linked | parents).filter(
+        Q(translation_key=page.translation_key) | Q(path__startswith=page.path)
+    ).exists():
+        return True
+    parent = page.get_parent()
+    return parent is not None and Page.objects.filter(
+        pk__in=parents, translation_key=parent.translation_key
+    ).exists()
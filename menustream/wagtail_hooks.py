@@ -0,0 +1,17 @@
+from wagtail import hooks
+
+from .tree import invalidate_menu_trees, menu_shows_page
+
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+@hooks.register('after_delete_page')
+def invalidate_menus_after_page_change(request, page):
+    # titles, urls and autofill lists of the compiled menus
+    if menu_shows_page(page):
+        invalidate_menu_trees()
+
+@hooks.register('after_move_page')
+def invalidate_menus_after_move(request, page):
+    # the page may have left an autofill parent - its old parent isn't known here
+    invalidate_menu_trees()
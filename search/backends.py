@@ -0,0 +1,85 @@
+import copy
+from collections import defaultdict
+
+from wagtail.models import Locale
+from wagtail.search.backends import get_search_backend
+from wagtail.search.backends.database.postgres.postgres import (PostgresIndex,
+                                                                PostgresSearchBackend)
+
+
+class LocaleIndex(PostgresIndex):
+    """
+    Index that writes each object with the text search config of its locale.
+    Objects without a locale use the backend's SEARCH_CONFIG.
+    """
+
+    def add_items(self, model, objs):
+        by_locale = defaultdict(list)
+        for obj in objs:
+            by_locale[self.backend.get_language_code(getattr(obj, "locale_id", None))].append(obj)
+        for language_code, locale_objs in by_locale.items():
+            PostgresIndex(self.backend.for_locale(language_code)).add_items(model, locale_objs)
+
+
+class LocaleSearchBackend(PostgresSearchBackend):
+    """
+    PostgreSQL search backend with one text search config per locale.
+
+    Pages (and other TranslatableMixin models) are indexed with the config for their
+    locale language code in LOCALE_SEARCH_CONFIGS, falling back to SEARCH_CONFIG.
+    Searches parse the query with SEARCH_CONFIG unless made through for_locale() -
+    front end searches use get_locale_search_backend() and limit their queryset to
+    the locale, so a Spanish query only scans and ranks Spanish entries with Spanish
+    stemming. Admin searches and choosers are unaffected and span every locale.
+
+    WAGTAILSEARCH_BACKENDS = {
+        'default': {
+            'BACKEND': 'search.backends',
+            'SEARCH_CONFIG': 'english_extended',
+            'LOCALE_SEARCH_CONFIGS': {'en': 'english_extended', 'es': 'spanish_extended'},
+        },
+    }
+    """
+
+    index_class = LocaleIndex
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.locale_configs = params.get("LOCALE_SEARCH_CONFIGS", {})
+        self.language_code = None
+        self._locale_backends = {}
+        self._language_codes = {}
+
+    def get_language_code(self, locale_id):
+        if locale_id is None:
+            return None
+        if locale_id not in self._language_codes:
+            self._language_codes = dict(Locale.objects.values_list("pk", "language_code"))
+        return self._language_codes.get(locale_id)
+
+    def for_locale(self, language_code):
+        """This backend bound to one locale's search config"""
+        if language_code is None or self.language_code is not None:
+            return self
+        backend = self._locale_backends.get(language_code)
+        if backend is None:
+            backend = copy.copy(self)
+            backend.language_code = language_code
+            backend.config = self.locale_configs.get(language_code, self.config)
+            backend._locale_backends = {}
+            self._locale_backends[language_code] = backend
+        return backend
+
+
+def get_locale_search_backend(locale):
+    """
+    The default search backend, bound to locale's search config if it has one per
+    locale. Filter the searched queryset to the locale as well.
+    """
+    backend = get_search_backend()
+    if hasattr(backend, "for_locale"):
+        backend = backend.for_locale(locale.language_code)
+    return backend
+
+
+SearchBackend = LocaleSearchBackend
@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from wagtail.search.utils import normalise_query_string
+
+SEARCH_GENERATION_KEY = "search-generation"
+SEARCH_RESULTS_KEY = "search-results:{}:{}"
+
+
+def _search_cache():
+    return caches[getattr(settings, "SEARCH_RESULT_CACHE_ALIAS", "default")]
+
+
+def get_search_generation():
+    cache = _search_cache()
+    generation = cache.get(SEARCH_GENERATION_KEY)
+    if generation is None:
+        cache.add(SEARCH_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(SEARCH_GENERATION_KEY)
+    return generation
+
+
+def bump_search_generation():
+    """
+    Invalidate every cached search result. Called on publish/unpublish/move/delete.
+    The key is deleted rather than overwritten so the change reaches the
+    per-process tier of every worker (see TwoTierDatabaseCache).
+    """
+    cache = _search_cache()
+    cache.delete(SEARCH_GENERATION_KEY)
+    cache.add(SEARCH_GENERATION_KEY, time.time_ns(), None)
+
+
+def get_search_result_ids(run_search, *, scope, site=None, locale=None, query="", order="relevance"):
+    """
+    Return the ranked list of page ids for a search, running run_search() (which must
+    return an iterable of pages) only on a cache miss.
+    Results are keyed on (scope, site, locale, normalised query, order) and the current
+    search generation, so any publish invalidates them all at once.
+    """
+    identity = "|".join([
+        scope,
+        str(getattr(site, "pk", site) or ""),
+        str(getattr(locale, "pk", locale) or ""),
+        normalise_query_string(query or ""),
+        order or "",
+    ])
+    cache_key = SEARCH_RESULTS_KEY.format(
+        get_search_generation(), hashlib.md5(identity.encode("utf-8")).hexdigest()
+    )
+    cache = _search_cache()
+    page_ids = cache.get(cache_key)
+    if page_ids is None:
+        page_ids = [page.pk for page in run_search()]
+        cache.set(cache_key, page_ids, getattr(settings, "SEARCH_RESULT_CACHE_TIMEOUT", 60 * 60))
+    return page_ids
+
+
+class SearchResultList:
+    """
+    Sequence over a ranked id list for use with Paginator. Only the ids in the
+    requested slice are loaded, from queryset, in ranked order. len() is free.
+    """
+
+    def __init__(self, page_ids, queryset):
+        self.page_ids = page_ids
+        self.queryset = queryset
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def count(self):
+        return len(self.page_ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            ids = self.page_ids[index]
+            pages = self.queryset.in_bulk(ids)
+            return [pages[pk] for pk in ids if pk in pages]
+        return self[index:index + 1 or None][0]
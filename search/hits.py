@@ -0,0 +1,215 @@
+import atexit
+import fcntl
+import glob
+import logging
+import os
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.search.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+
+class SearchHitBuffer:
+    """
+    Aggregates search hits per (query, date) in process memory and writes them to the
+    search promotion tables (Query / QueryDailyHits) in bulk.
+
+    The buffer is flushed by a timer thread as soon as it holds SEARCH_HIT_FLUSH_SIZE
+    hits or SEARCH_HIT_FLUSH_INTERVAL seconds after the first unflushed hit, and at
+    exit. Requests only append to the spool and the counts.
+
+    Each hit is also appended to a spool file in SEARCH_HIT_SPOOL_DIR, held under an
+    exclusive lock by this process. A spool file that can be locked by another process
+    belongs to a worker that died before flushing - its hits are replayed into the
+    database on the next flush, so no counts are lost on restart.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.size = 0
+        self.timer = None
+        self.flush_pending = False
+        self.spool = None
+        self.spool_dir = getattr(
+            settings, "SEARCH_HIT_SPOOL_DIR", os.path.join(settings.BASE_DIR, "data", "search-hits")
+        )
+        self.flush_size = getattr(settings, "SEARCH_HIT_FLUSH_SIZE", 100)
+        self.flush_interval = getattr(settings, "SEARCH_HIT_FLUSH_INTERVAL", 30)
+        atexit.register(self.flush)
+
+    # --- spool -----------------------------------------------------------
+
+    def _open_spool(self):
+        # caller must hold the lock
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            path = os.path.join(self.spool_dir, f"{os.getpid()}-{uuid.uuid4().hex}.spool")
+            spool = open(path, "a", encoding="utf-8")
+            fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.spool = spool
+        except OSError as e:
+            logger.warning(f"Search hits will not be spooled to {self.spool_dir}: {e}")
+            self.spool = False
+
+    def _spool_hit(self, query_string, date):
+        # caller must hold the lock
+        if self.spool is None:
+            self._open_spool()
+        if self.spool:
+            self.spool.write(f"{date.isoformat()}\t{query_string}\n")
+            self.spool.flush()
+
+    def _replay_orphaned_spools(self, counts):
+        """Add the hits from spool files no longer locked by a live process to counts"""
+        own = self.spool.name if self.spool else None
+        orphans = []
+        for path in glob.glob(os.path.join(self.spool_dir, "*.spool")):
+            if path == own:
+                continue
+            try:
+                f = open(path, "r+", encoding="utf-8")
+            except OSError:
+                continue
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()  # still in use
+                continue
+            for line in f:
+                date, _, query_string = line.rstrip("\n").partition("\t")
+                if query_string:
+                    counts[(query_string, date)] += 1
+            orphans.append(f)
+        return orphans
+
+    # --- buffer ------------------------------------------------------------
+
+    def add(self, query_string):
+        query_string = normalise_query_string(query_string)
+        if not query_string:
+            return
+        date = timezone.now().date()
+        with self.lock:
+            self._spool_hit(query_string, date)
+            self.counts[(query_string, date.isoformat())] += 1
+            self.size += 1
+            if self.size >= self.flush_size and not self.flush_pending:
+                # a full buffer is written by the timer thread straight away, never
+                # in the request
+                self.flush_pending = True
+                if self.timer is not None:
+                    self.timer.cancel()
+                self._start_timer(0)
+            elif self.timer is None:
+                self._start_timer(self.flush_interval)
+
+    def _start_timer(self, delay):
+        # caller must hold the lock
+        self.timer = threading.Timer(delay, self._timed_flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts, self.size = self.counts, Counter(), 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.flush_pending = False
+            # rotate the spool - the filled one is deleted once its hits are saved
+            spool = self.spool
+            self.spool = None
+        # the filled spool stays open (and locked) until its hits are saved so no
+        # other process replays it concurrently
+
+        orphans = []
+        if os.path.isdir(self.spool_dir):
+            orphans = self._replay_orphaned_spools(counts)
+        if spool:
+            orphans.append(spool)
+        if not counts:
+            self._remove(orphans)
+            return
+
+        try:
+            save_search_hits(counts)
+        except Exception as e:
+            # spool files are left in place (unlocked) for the next flush to replay
+            logger.error(f"Saving search hits failed: {e}")
+            for f in orphans:
+                f.close()
+            if not spool:
+                # nothing durable to replay from, keep the counts for the next flush
+                with self.lock:
+                    self.counts.update(counts)
+                    self.size += sum(counts.values())
+            return
+        self._remove(orphans)
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        finally:
+            # the timer thread's database connection would otherwise never be closed
+            connections.close_all()
+
+    def _remove(self, files):
+        for f in files:
+            try:
+                os.remove(f.name)
+            except OSError:
+                pass
+            f.close()
+
+
+def save_search_hits(counts):
+    """Add {(normalised query string, iso date): hits} to Query / QueryDailyHits in bulk"""
+    from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+
+    query_strings = {query_string for query_string, _ in counts}
+    with transaction.atomic():
+        Query.objects.bulk_create(
+            [Query(query_string=query_string) for query_string in query_strings],
+            ignore_conflicts=True,
+        )
+        query_ids = dict(
+            Query.objects.filter(query_string__in=query_strings).values_list("query_string", "pk")
+        )
+        existing = {
+            (daily_hits.query_id, daily_hits.date.isoformat()): daily_hits
+            for daily_hits in QueryDailyHits.objects.select_for_update().filter(
+                query_id__in=query_ids.values(), date__in={date for _, date in counts}
+            )
+        }
+        to_update, to_create = [], []
+        for (query_string, date), hits in counts.items():
+            daily_hits = existing.get((query_ids[query_string], date))
+            if daily_hits:
+                daily_hits.hits = F("hits") + hits
+                to_update.append(daily_hits)
+            else:
+                to_create.append(QueryDailyHits(query_id=query_ids[query_string], date=date, hits=hits))
+        QueryDailyHits.objects.bulk_update(to_update, ["hits"])
+        QueryDailyHits.objects.bulk_create(to_create)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def record_search_hit(query_string):
+    """Count a search for query_string without writing to the database in the request"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = SearchHitBuffer()
+    _buffer.add(query_string)
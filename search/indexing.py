@@ -0,0 +1,137 @@
+import json
+import os
+
+from django.apps import apps
+from django.db import connections, models
+from django.db.models.constants import LOOKUP_SEP
+from wagtail.fields import StreamField
+from wagtail.search.backends import get_search_backend
+from wagtail.search.backends.database.postgres.postgres import (IndexEntry,
+                                                                ObjectIndexer)
+from wagtail.search.index import (AutocompleteField, FilterField,
+                                  RelatedFields, SearchField)
+from wagtail.search.utils import get_content_type_pk
+
+
+def get_bulk_queryset(model):
+    """
+    model.get_indexed_objects() (with its tag/related prefetches) minus the large text,
+    JSON and StreamField columns that no search or filter field reads.
+    """
+    used = {
+        field.field_name.split(LOOKUP_SEP)[0]
+        for field in model.get_search_fields()
+        if isinstance(field, (SearchField, AutocompleteField, FilterField, RelatedFields))
+    }
+    unneeded = [
+        field.name
+        for field in model._meta.concrete_fields
+        if isinstance(field, (models.TextField, models.JSONField, StreamField))
+        and field.name not in used
+    ]
+    return model.get_indexed_objects().defer(*unneeded)
+
+
+def extract_index_texts(obj, backend):
+    """
+    The (text, weight) lists an index entry is built from - title, body and
+    autocomplete - grouped the same way as the database backend's ObjectIndexer.
+    """
+    indexer = ObjectIndexer(obj, backend)
+    title, body, autocomplete = [], [], []
+    for field in indexer.search_fields:
+        for current_field, weight, value in indexer.prepare_field(obj, field):
+            if isinstance(current_field, AutocompleteField):
+                autocomplete.append((value, weight))
+            elif isinstance(current_field, SearchField):
+                (title if current_field.field_name == "title" else body).append((value, weight))
+    return title, body, autocomplete
+
+
+def extract_chunk(args):
+    """
+    Process pool worker: load one chunk of objects and return
+    [(pk, locale_id, title, body, autocomplete)] in pk order.
+    """
+    backend_name, label, pks = args
+    model = apps.get_model(label)
+    backend = get_search_backend(backend_name)
+    objects = get_bulk_queryset(model).in_bulk(pks)
+    return [
+        (pk, getattr(objects[pk], "locale_id", None), *extract_index_texts(objects[pk], backend))
+        for pk in pks
+        if pk in objects
+    ]
+
+
+def _vector_sql(texts, config):
+    texts = [(text.strip(), weight) for text, weight in texts if text and text.strip()]
+    if not texts:
+        return "to_tsvector(%s)", [""]
+    term = "setweight(to_tsvector(%s::regconfig, %s), %s)" if config else "setweight(to_tsvector(%s), %s)"
+    params = []
+    for text, weight in texts:
+        params.extend([config, text, weight] if config else [text, weight])
+    return " || ".join([term] * len(texts)), params
+
+
+def write_index_entries(model, entries, backend):
+    """
+    Upsert prepared entries (from extract_chunk) into the index in one statement.
+    Each entry uses the text search config of its locale when the backend has one
+    per locale (search.backends.LocaleSearchBackend).
+    """
+    if not entries:
+        return
+    content_type_pk = get_content_type_pk(model)
+    rows, params = [], []
+    for pk, locale_id, title, body, autocomplete in entries:
+        if hasattr(backend, "for_locale"):
+            config = backend.for_locale(backend.get_language_code(locale_id)).config
+        else:
+            config = backend.config
+        title_sql, title_params = _vector_sql(title, config)
+        autocomplete_sql, autocomplete_params = _vector_sql(autocomplete, backend.autocomplete_config)
+        body_sql, body_params = _vector_sql(body, config)
+        rows.append(f"(%s, %s, {title_sql}, {autocomplete_sql}, {body_sql}, 1.0)")
+        params.extend([content_type_pk, str(pk), *title_params, *autocomplete_params, *body_params])
+
+    with connections[IndexEntry.objects.db].cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {IndexEntry._meta.db_table} (content_type_id, object_id, title, autocomplete, body, title_norm)
+            VALUES {", ".join(rows)}
+            ON CONFLICT (content_type_id, object_id)
+            DO UPDATE SET title = EXCLUDED.title,
+                          title_norm = 1.0,
+                          autocomplete = EXCLUDED.autocomplete,
+                          body = EXCLUDED.body
+            """,
+            params,
+        )
+
+
+class Checkpoint:
+    """Last indexed pk per model label, saved to a json file after every chunk"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f)
+
+    def get(self, label):
+        return self.done.get(label)
+
+    def save(self, label, pk):
+        self.done[label] = pk
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.done, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+
+from search.indexing import Checkpoint, extract_chunk, write_index_entries
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild search index entries in bulk: pages are streamed in pk order in chunks, "
+        "their text extracted in a process pool and written one statement per chunk. "
+        "Progress is checkpointed after every chunk so an interrupted run can --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Model labels, e.g. goneforawander.RecipePage (default all indexed)")
+        parser.add_argument("--backend", default="default", help="WAGTAILSEARCH_BACKENDS alias")
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(settings.BASE_DIR, "data", "search-index-checkpoint.json"),
+            help="Checkpoint file",
+        )
+
+    def get_models(self, labels):
+        if not labels:
+            return get_indexed_models()
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+            if model not in get_indexed_models():
+                raise CommandError(f"{label} is not indexed")
+            models.append(model)
+        return models
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options["backend"])
+        checkpoint = Checkpoint(options["checkpoint"], resume=options["resume"])
+        chunk_size = options["chunk_size"]
+
+        # workers are forked - they must open their own database connections
+        connections.close_all()
+        models = self.get_models(options["models"])
+        pool = multiprocessing.get_context("fork").Pool(options["processes"]) if options["processes"] > 1 else None
+        try:
+            for model in models:
+                label = model._meta.label
+                start = time.monotonic()
+                pks = model.get_indexed_objects().order_by("pk").values_list("pk", flat=True)
+                if checkpoint.get(label) is not None:
+                    pks = pks.filter(pk__gt=checkpoint.get(label))
+                chunks = (
+                    (options["backend"], label, chunk) for chunk in chunked(list(pks), chunk_size)
+                )
+                results = pool.imap(extract_chunk, chunks) if pool else map(extract_chunk, chunks)
+
+                count = 0
+                for entries in results:
+                    if not entries:
+                        continue
+                    write_index_entries(model, entries, backend)
+                    checkpoint.save(label, entries[-1][0])
+                    count += len(entries)
+
+                index = backend.get_index_for_model(model)
+                index.delete_stale_model_entries(model)
+                self.stdout.write(f"{label}: {count} entries in {time.monotonic() - start:.1f}s")
+
+            if models:
+                index._refresh_title_norms(full=True)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS("Search index updated"))
@@ -0,0 +1,44 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Locale, TranslatableMixin
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Reindex the objects of one locale with that locale's text search config. "
+        "Entries for other locales are not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("language_code", help="Locale language code, e.g. es")
+        parser.add_argument("--backend", default="default", help="WAGTAILSEARCH_BACKENDS alias")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            locale = Locale.objects.get(language_code=options["language_code"])
+        except Locale.DoesNotExist:
+            raise CommandError(f"No locale with language code '{options['language_code']}'")
+
+        backend = get_search_backend(options["backend"])
+        if not hasattr(backend, "for_locale"):
+            raise CommandError(f"Search backend '{options['backend']}' is not a LocaleSearchBackend")
+        locale_backend = backend.for_locale(locale.language_code)
+        self.stdout.write(f"Indexing {locale} with search config '{locale_backend.config}'")
+
+        for model in get_indexed_models():
+            if not issubclass(model, TranslatableMixin):
+                continue
+            index = backend.get_index_for_model(model)
+            objects = model.get_indexed_objects().filter(locale=locale).iterator(options["chunk_size"])
+            count = 0
+            while chunk := list(islice(objects, options["chunk_size"])):
+                index.add_items(model, chunk)
+                count += len(chunk)
+            if count:
+                self.stdout.write(f"  {model._meta.label}: {count}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index for {locale}"))
@@ -1,9 +1,12 @@
+from core.renditions import BLOG_CARD_SPECS, prefetch_renditions
 from core.utils import paginator_range
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
 from wagtail.models import Locale, Page, Site
-from wagtail.search.backends import get_search_backend
-from wagtail.contrib.search_promotions.models import Query
+
+from .backends import get_locale_search_backend
+from .cache import SearchResultList, get_search_result_ids
+from .hits import record_search_hit
 
 
 def enzed_search(request):
@@ -14,30 +17,39 @@ def enzed_search(request):
     except:
         page = 1
     
-    # Search
-    # These 2 lines commented until multi-index backend supported - one backend per locale
-    # backend = 'default' if Locale.get_active()==Locale.get_default() else Locale.get_active().language_code
-    # s = get_search_backend(backend)
-    s = get_search_backend()
+    # Search - the active locale's pages with its search config
+    locale = Locale.get_active()
+    s = get_locale_search_backend(locale)
 
     # Resolve current site (works with/without SiteMiddleware)
     site = getattr(request, "site", None) or Site.find_for_request(request)
     # Base scope: live pages, deferred streamfields, limited to current site
-    base_scope = Page.objects.live().defer_streamfields()
+    base_scope = Page.objects.live().defer_streamfields().filter(locale=locale)
     if site:
         base_scope = base_scope.descendant_of(site.root_page, inclusive=True)
     
     if search_query:
         if search_order=='date':
             scope = base_scope.order_by('-first_published_at')
-            search_results = s.search(search_query, scope, order_by_relevance=False)
+            run_search = lambda: s.search(search_query, scope, order_by_relevance=False)
         else:
             scope = base_scope
-            search_results = s.search(search_query, scope, order_by_relevance=True)
-            
-        # Record hit
-        query = Query.get(search_query)
-        query.add_hit()
+            run_search = lambda: s.search(search_query, scope, order_by_relevance=True)
+
+        # Ranked ids are cached until the next publish, pagination slices the id list
+        page_ids = get_search_result_ids(
+            run_search,
+            scope="site",
+            site=site,
+            locale=locale,
+            query=search_query,
+            order=search_order,
+        )
+        # result pages are loaded as their specific type for the cards
+        search_results = SearchResultList(page_ids, base_scope.specific())
+
+        # Record hit - buffered and written to the search promotion tables in bulk
+        record_search_hit(search_query)
 
     else:
         search_results = Page.objects.none()
@@ -50,6 +62,8 @@ def enzed_search(request):
         search_results = paginator.page(1)
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
+    # card images and renditions for the whole page in a constant number of queries
+    search_results.object_list = prefetch_renditions(search_results.object_list, BLOG_CARD_SPECS)
 
     context={}
     context["search_query"] = search_query
@@ -0,0 +1,11 @@
+from wagtail import hooks
+
+from .cache import bump_search_generation
+
+
+@hooks.register('after_publish_page')
+@hooks.register('after_unpublish_page')
+@hooks.register('after_move_page')
+@hooks.register('after_delete_page')
+def invalidate_search_results(request, page):
+    bump_search_generation()